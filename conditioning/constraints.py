@@ -1,6 +1,6 @@
 from collections import defaultdict
 
-from z3 import Solver, ArithRef, Int, And, Implies, If, Sum, Or, Abs
+from z3 import Solver, ArithRef, Int, Bool, And, Implies, If, Sum, Or, Abs, PbEq, PbLe
 import gurobipy as gp
 from pulp import LpVariable, LpBinary, lpSum, LpInteger
 
@@ -58,15 +58,29 @@ class RoomConflictConstraint(IConstraint):
     """
 
     def apply_z3(self, solver, problem, exam_time, exam_room):
-        for e1 in range(problem.number_of_exams):
-            for e2 in range(e1 + 1, problem.number_of_exams):
-                solver.add(
-                    Implies(
-                        And(exam_room[e1] == exam_room[e2],
-                            exam_time[e1] == exam_time[e2]),
-                        e1 == e2
-                    )
-                )
+        # Channel each exam's (room, slot) choice into one boolean per cell, so the
+        # conflict check becomes a pseudo-boolean at-most-one per (room, slot)
+        # instead of an implication for every pair of exams
+        cells = [
+            [
+                [Bool(f'exam_{e}_room_{r}_time_{t}') for t in range(problem.number_of_slots)]
+                for r in range(problem.number_of_rooms)
+            ]
+            for e in range(problem.number_of_exams)
+        ]
+
+        for e in range(problem.number_of_exams):
+            for r in range(problem.number_of_rooms):
+                for t in range(problem.number_of_slots):
+                    solver.add(cells[e][r][t] == And(exam_room[e] == r, exam_time[e] == t))
+            # Every exam occupies exactly one (room, slot) cell
+            solver.add(PbEq([(cells[e][r][t], 1)
+                             for r in range(problem.number_of_rooms)
+                             for t in range(problem.number_of_slots)], 1))
+
+        for r in range(problem.number_of_rooms):
+            for t in range(problem.number_of_slots):
+                solver.add(PbLe([(cells[e][r][t], 1) for e in range(problem.number_of_exams)], 1))
 
     def apply_ortools(self, model, problem, exam_time, exam_room):
         for e1 in range(problem.number_of_exams):
@@ -165,7 +179,9 @@ class RoomCapacityConstraint(IConstraint):
                     M = problem.number_of_slots + 1
                     model.addConstr(exam_time[e] - t <= M * (1 - exam_in_room[e]))
                     model.addConstr(exam_room[e] - r <= M * (1 - exam_in_room[e]))
-                model.addConstr(gp.quicksum(problem.exams[e].get_student_count() * exam_in_room[e] for e in range(problem.number_of_exams)) <= problem.rooms[r].capacity)
+                # Named so a reused model can retarget the capacity through the row's RHS
+                model.addConstr(gp.quicksum(problem.exams[e].get_student_count() * exam_in_room[e] for e in range(problem.number_of_exams)) <= problem.rooms[r].capacity,
+                                name=f'capacity_{r}_{t}')
 
     def apply_cbc(self, model, problem, exam_time, exam_room):
         for t in range(problem.number_of_slots):
@@ -1094,3 +1110,35 @@ class InvigilatorBreakConstraint(IConstraint):
                         scores.append(100)  # Has break
 
         return sum(scores) / len(scores) if scores else 100
+
+
+# Constraint classes keyed by the names used to activate them
+CONSTRAINT_REGISTRY = {
+    'single_assignment': SingleAssignmentConstraint,
+    'room_conflicts': RoomConflictConstraint,
+    'room_capacity': RoomCapacityConstraint,
+    'student_spacing': NoConsecutiveSlotsConstraint,
+    'max_exams_per_slot': MaxExamsPerSlotConstraint,
+    'morning_sessions': MorningSessionPreferenceConstraint,
+    'exam_group_size': ExamGroupSizeOptimizationConstraint,
+    'department_grouping': DepartmentGroupingConstraint,
+    'room_balancing': RoomBalancingConstraint,
+    'invigilator_assignment': InvigilatorAssignmentConstraint,
+    'break_period': BreakPeriodConstraint,
+    'invigilator_break': InvigilatorBreakConstraint
+}
+
+# Core constraints applied when a solver is given no explicit selection
+DEFAULT_CONSTRAINTS = (
+    'single_assignment', 'room_conflicts',
+    'room_capacity', 'student_spacing',
+    'max_exams_per_slot'
+)
+
+
+def build_constraints(active_constraints=None) -> list:
+    """Instantiate the named constraints in order, defaulting to the core set and skipping unknown and repeated names"""
+    if active_constraints is None:
+        active_constraints = DEFAULT_CONSTRAINTS
+    # A repeated name would add the same rows to a model twice, so keep only its first occurrence
+    return [CONSTRAINT_REGISTRY[name]() for name in dict.fromkeys(active_constraints) if name in CONSTRAINT_REGISTRY]
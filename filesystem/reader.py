@@ -1,63 +1,79 @@
 import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
 
 from utilities import SchedulingProblem, Room, TimeSlot, Exam
 
+# A whole enrolment block: lines that are blank or hold exactly two integers
+_ENROLMENT_BLOCK = re.compile(r'(?:[^\S\n]*(?:\d+[^\S\n]+\d+[^\S\n]*)?\n)*[^\S\n]*(?:\d+[^\S\n]+\d+[^\S\n]*)?')
+# A single "exam student" line
+_ENROLMENT_LINE = re.compile(r'^\s*(\d+)\s+(\d+)\s*$')
+
+
+@lru_cache(maxsize=None)
+def _attribute_pattern(name: str) -> re.Pattern:
+    """Compiled pattern for a "name: value" header line, built once per attribute name"""
+    return re.compile(rf'{name}:\s*(\d+)$')
+
 
 class ProblemFileReader:
     """Handles reading and parsing problem files"""
 
     @staticmethod
     def read_file(filename: str) -> SchedulingProblem:
-        def read_attribute(name: str, f) -> int:
-            line = f.readline()
-            match = re.match(f'{name}:\\s*(\\d+)$', line)
+        text = Path(filename).read_text()
+
+        def read_attribute(name: str) -> int:
+            nonlocal text
+            line, _, text = text.partition('\n')
+            match = _attribute_pattern(name).match(line)
             if not match:
                 raise Exception(f"Could not parse line {line}; expected the {name} attribute")
             return int(match.group(1))
 
-        with open(filename) as f:
-            num_students = read_attribute("Number of students", f)
-            num_exams = read_attribute("Number of exams", f)
-            num_slots = read_attribute("Number of slots", f)
-            num_rooms = read_attribute("Number of rooms", f)
-
-            # Create rooms
-            rooms = []
-            for r in range(num_rooms):
-                capacity = read_attribute(f"Room {r} capacity", f)
-                rooms.append(Room(r, capacity))
-
-            # Create time slots
-            time_slots = [TimeSlot(t) for t in range(num_slots)]
-
-            # Create exams with their students
-            exam_students = {}
-            for line in f:
-                if line.strip():
-                    match = re.match('^\\s*(\\d+)\\s+(\\d+)\\s*$', line)
-                    if not match:
-                        raise Exception(f'Failed to parse line: {line}')
-                    exam_id = int(match.group(1))
-                    student_id = int(match.group(2))
-
-                    if exam_id not in exam_students:
-                        exam_students[exam_id] = set()
-                    exam_students[exam_id].add(student_id)
-
-            exams = [
-                Exam(exam_id, students)
-                for exam_id, students in exam_students.items()
-            ]
-
-            problem = SchedulingProblem(
-                name=filename,
-                rooms=rooms,
-                time_slots=time_slots,
-                exams=exams,
-                total_students=num_students
-            )
-
-            # Add default invigilators equal to number of rooms
-            problem.add_default_invigilators()
-
-            return problem
+        num_students = read_attribute("Number of students")
+        num_exams = read_attribute("Number of exams")
+        num_slots = read_attribute("Number of slots")
+        num_rooms = read_attribute("Number of rooms")
+
+        # Create rooms
+        rooms = []
+        for r in range(num_rooms):
+            capacity = read_attribute(f"Room {r} capacity")
+            rooms.append(Room(r, capacity))
+
+        # Create time slots
+        time_slots = [TimeSlot(t) for t in range(num_slots)]
+
+        # Validate the remaining "exam student" lines in one pass, then parse them all at once
+        if not _ENROLMENT_BLOCK.fullmatch(text):
+            line = next(line for line in text.splitlines()
+                        if line.strip() and not _ENROLMENT_LINE.match(line))
+            raise Exception(f'Failed to parse line: {line}')
+        enrolments = np.fromstring(text, dtype=np.int64, sep=' ').reshape(-1, 2)
+
+        # Create exams with their students, keeping exams in order of first appearance
+        exam_ids, first_seen, counts = np.unique(enrolments[:, 0], return_index=True, return_counts=True)
+        order = np.argsort(enrolments[:, 0], kind='stable')
+        groups = np.split(enrolments[order, 1], np.cumsum(counts)[:-1])
+        exam_students = {int(exam_ids[i]): set(groups[i].tolist()) for i in np.argsort(first_seen)}
+
+        exams = [
+            Exam(exam_id, students)
+            for exam_id, students in exam_students.items()
+        ]
+
+        problem = SchedulingProblem(
+            name=filename,
+            rooms=rooms,
+            time_slots=time_slots,
+            exams=exams,
+            total_students=num_students
+        )
+
+        # Add default invigilators equal to number of rooms
+        problem.add_default_invigilators()
+
+        return problem
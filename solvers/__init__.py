@@ -3,7 +3,7 @@ Herein lies a total of 1 suggested solver, with another 4 alternative solvers,
 TOTALING to 5 solvers to perform the solution.
 """
 
-from .zthree import ZThreeSolver
+from .zthree import ZThreeSolver, build_tactic_solver
 from .gurobi import GurobiSolver
 from .ortools import ORToolsSolver
 from .cbc import CBCSolver
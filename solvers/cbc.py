@@ -6,72 +6,149 @@ from pulp import (
     LpInteger,
     LpBinary,
     PULP_CBC_CMD,
-    LpStatus,
-    value,
-    lpSum
+    LpSolutionOptimal,
+    LpSolutionIntegerFeasible,
+    LpAffineExpression,
+    getSolver,
+    listSolvers
 )
+# Import defaultdict for grouping exams by student
+from collections import defaultdict
+# Import lru_cache to probe the available MIP backends once
+from functools import lru_cache
+# Import os to size CBC's thread count to the machine
+import os
+# Import subprocess and tempfile to run the CBC executable on a written MPS file
+import subprocess
+import tempfile
 # Import type hinting support
 from typing import Any
 
-# Import custom constraint and utility classes for exam scheduling
-from conditioning import SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, MorningSessionPreferenceConstraint, \
-    ExamGroupSizeOptimizationConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, BreakPeriodConstraint, InvigilatorBreakConstraint
+# Import numpy to hold binary assignment variables as dense arrays
+import numpy as np
+
+# Import the builder for active constraint instances
+from conditioning import build_constraints
 # Import base solver and scheduling problem classes
-from utilities import BaseSolver, SchedulingProblem
+from utilities import BaseSolver, SchedulingProblem, LRUCache, greedy_assign, solver_threads
+
+
+# Prebuilt models keyed by (exams, rooms, slots, room capacities)
+_model_cache = LRUCache()
+# In-process PuLP backends preferred over the CBC executable, best first
+IN_PROCESS_BACKENDS = ('HiGHS',)
+
+
+# Name of the best in-process backend PuLP can use here, or None to run the CBC executable
+@lru_cache(maxsize=None)
+def available_backend():
+    available = set(listSolvers(onlyAvailable=True))
+    return next((name for name in IN_PROCESS_BACKENDS if name in available), None)
 
 
 # Define a solver class using COIN-OR CBC (Coin-or Branch and Cut) solver for exam scheduling
 class CBCSolver(BaseSolver):
     # Initialize the solver with a scheduling problem and optional active constraints
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, formulation: str = 'binary'):
         # Store the scheduling problem instance
         self.problem = problem
+        # 'binary' uses one variable per (exam, room, slot); 'compact' uses one time and one room choice per exam,
+        # a smaller model whose pairwise big-M ordering rows give a much weaker LP bound, so it solves slower
+        self.formulation = formulation
+
+        # Exam sizes and room capacities as flat arrays, read once instead of per model term
+        self.exam_size = np.fromiter((exam.get_student_count() for exam in problem.exams),
+                                     dtype=np.int32, count=problem.number_of_exams)
+        self.room_capacity = np.fromiter((room.capacity for room in problem.rooms),
+                                         dtype=np.int32, count=problem.number_of_rooms)
+
+        if formulation == 'binary':
+            # Reuse the variables and instance-independent constraints of a model built for the same shape
+            shape = (problem.number_of_exams, problem.number_of_rooms, problem.number_of_slots,
+                     tuple(self.room_capacity.tolist()))
+            shape_model = _model_cache.get(shape)
+            if shape_model is None:
+                shape_model = self._build_shape_model(problem)
+                _model_cache.put(shape, shape_model)
+            self.shape_model, self.exam_assignment, self.exam_slot = shape_model
+        else:
+            # Create a linear programming minimization problem
+            self.model = LpProblem("AssessmentScheduler", LpMinimize)
+
+            # Create one integer time slot variable per exam
+            self.exam_time = [
+                LpVariable(name=f'exam_{e}_time', lowBound=0, upBound=problem.number_of_slots - 1, cat=LpInteger)
+                for e in range(problem.number_of_exams)
+            ]
+
+            # Rooms large enough for each exam; other rooms never get a variable
+            self.rooms_for = [
+                np.flatnonzero(self.room_capacity >= self.exam_size[e]).tolist()
+                for e in range(problem.number_of_exams)
+            ]
+
+            # Create binary one-hot room choice variables over each exam's feasible rooms
+            self.exam_room_choice = {
+                (e, r): LpVariable(name=f'exam_{e}_room_{r}', cat=LpBinary)
+                for e in range(problem.number_of_exams)
+                for r in self.rooms_for[e]
+            }
+
+        # Stop CBC after this many seconds, or once within this relative gap of optimal
+        self.time_limit = 30
+        self.mip_gap = 0.01
+        # Add symmetry-breaking rows for interchangeable exams and rooms in the compact formulation
+        self.symmetry_breaking = True
+        # Solve in-process with the best available backend (e.g. HiGHS when highspy is installed),
+        # falling back to the bundled CBC executable
+        self.backend = available_backend()
+
+        # Map each student to the exams they sit, built in a single pass over enrolments
+        self.student_to_exams = defaultdict(list)
+        for e, exam in enumerate(problem.exams):
+            for student in exam.students:
+                self.student_to_exams[student].append(e)
+
+        # Instantiate the active constraints, defaulting to the core set
+        self.constraints = build_constraints(active_constraints)
+
+    # Build the model parts that depend only on problem shape: variables, assignment, slot links, objective
+    @staticmethod
+    def _build_shape_model(problem: SchedulingProblem):
         # Create a linear programming minimization problem
-        self.model = LpProblem("AssessmentScheduler", LpMinimize)
+        model = LpProblem("AssessmentScheduler", LpMinimize)
+
+        # Create binary decision variables for exam assignments as an (exam, room, time slot) array
+        exam_assignment = np.empty((problem.number_of_exams, problem.number_of_rooms, problem.number_of_slots),
+                                   dtype=object)
+        for e, r, t in np.ndindex(exam_assignment.shape):
+            exam_assignment[e, r, t] = LpVariable(
+                name=f'exam_{e}_room_{r}_time_{t}',
+                cat=LpBinary
+            )
+
+        # Create binary aggregators marking which time slot each exam sits in, whatever the room
+        exam_slot = np.empty((problem.number_of_exams, problem.number_of_slots), dtype=object)
+        for e, t in np.ndindex(exam_slot.shape):
+            exam_slot[e, t] = LpVariable(
+                name=f'exam_{e}_time_{t}',
+                cat=LpBinary
+            )
 
-        # Create binary decision variables for exam assignments (exam, room, time slot)
-        self.exam_assignment = {}
+        # Constraint: Each exam must be assigned exactly once
         for e in range(problem.number_of_exams):
-            for r in range(problem.number_of_rooms):
-                for t in range(problem.number_of_slots):
-                    self.exam_assignment[(e, r, t)] = LpVariable(
-                        name=f'exam_{e}_room_{r}_time_{t}',
-                        cat=LpBinary
-                    )
-
-        # Initialize an empty list to store active constraints
-        self.constraints = []
-
-        # Create a mapping of constraint names to their corresponding constraint classes
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        # Set default core constraints if none are specified
-        if active_constraints is None:
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
+            model += LpAffineExpression([(v, 1) for v in exam_assignment[e].ravel().tolist()]) == 1
 
-        # Add active constraints to the constraints list
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        # Constraint: Link each exam's slot aggregator to its room assignments in that slot
+        for e in range(problem.number_of_exams):
+            for t in range(problem.number_of_slots):
+                model += exam_slot[e, t] == LpAffineExpression([(v, 1) for v in exam_assignment[e, :, t].tolist()])
+
+        # Objective function: Minimize total time slots used, built once from flat (variable, slot) pairs
+        slot_coefficients = np.broadcast_to(np.arange(problem.number_of_slots), exam_assignment.shape)
+        model += LpAffineExpression(list(zip(exam_assignment.ravel().tolist(), slot_coefficients.ravel().tolist())))
+
+        return model, exam_assignment, exam_slot
 
     # Static method to return the name of the solver
     @staticmethod
@@ -81,84 +158,9 @@ class CBCSolver(BaseSolver):
     # Method to solve the exam scheduling problem
     def solve(self) -> list[dict[str, int | Any]] | None:
         try:
-            # Constraint: Each exam must be assigned exactly once
-            for e in range(self.problem.number_of_exams):
-                self.model += lpSum(self.exam_assignment[(e, r, t)]
-                                    for r in range(self.problem.number_of_rooms)
-                                    for t in range(self.problem.number_of_slots)) == 1
-
-            # Constraint: Ensure room capacity is not exceeded
-            for r in range(self.problem.number_of_rooms):
-                for t in range(self.problem.number_of_slots):
-                    self.model += lpSum(
-                        self.exam_assignment[(e, r, t)] * self.problem.exams[e].get_student_count()
-                        for e in range(self.problem.number_of_exams)
-                    ) <= self.problem.rooms[r].capacity
-
-            # Constraint: Handle student conflicts
-            for student in range(self.problem.total_students):
-                # Find exams that the student is enrolled in
-                student_exams = [e for e in range(self.problem.number_of_exams)
-                                 if student in self.problem.exams[e].students]
-
-                # Constraint: No same time slot for a student's exams
-                for t in range(self.problem.number_of_slots):
-                    self.model += lpSum(
-                        self.exam_assignment[(e, r, t)]
-                        for e in student_exams
-                        for r in range(self.problem.number_of_rooms)
-                    ) <= 1
-
-                # Constraint: No consecutive time slots for a student's exams
-                for t in range(self.problem.number_of_slots - 1):
-                    self.model += lpSum(
-                        self.exam_assignment[(e, r, t)] + self.exam_assignment[(e, r, t + 1)]
-                        for e in student_exams
-                        for r in range(self.problem.number_of_rooms)
-                    ) <= 1
-
-            # Objective function: Minimize total time slots used
-            self.model += lpSum(
-                t * self.exam_assignment[(e, r, t)]
-                for e in range(self.problem.number_of_exams)
-                for r in range(self.problem.number_of_rooms)
-                for t in range(self.problem.number_of_slots)
-            )
-
-            # Initialize the solver with suppressed messages
-            solver = PULP_CBC_CMD(msg=0)
-            # Solve the linear programming problem
-            status = self.model.solve(solver)
-
-            # Check if a solution was found
-            if status >= 0:
-                # Initialize solution list
-                solution = []
-                # Extract exam assignments
-                for e in range(self.problem.number_of_exams):
-                    found = False
-                    for r in range(self.problem.number_of_rooms):
-                        for t in range(self.problem.number_of_slots):
-                            # Check if this exam is assigned to this room and time slot
-                            if value(self.exam_assignment[(e, r, t)]) > 0.5:
-                                solution.append({
-                                    'examId': e,
-                                    'room': r,
-                                    'timeSlot': t
-                                })
-                                found = True
-                                break
-                        if found:
-                            break
-                    # Return None if any exam is not assigned
-                    if not found:
-                        return None
-
-                # Return solution if all exams are assigned, otherwise return None
-                return solution if len(solution) == self.problem.number_of_exams else None
-
-            # Return None if no solution is found
-            return None
+            if self.formulation == 'binary':
+                return self._solve_binary()
+            return self._solve_compact()
 
         # Handle any exceptions during solving
         except Exception as e:
@@ -166,3 +168,287 @@ class CBCSolver(BaseSolver):
             print(f"CBC Solver error: {str(e)}")
             # Return None to indicate solving failed
             return None
+
+    # Solve with integer exam times and one-hot room choices: O(E) columns plus pairwise ordering binaries
+    def _solve_compact(self) -> list[dict[str, int | Any]] | None:
+        number_of_slots = self.problem.number_of_slots
+
+        # An exam that fits no room, or no slots at all, makes the instance infeasible
+        if self.problem.number_of_exams and (number_of_slots == 0 or not all(self.rooms_for)):
+            return None
+
+        # Constraint: Each exam is placed in exactly one room it fits in
+        for e in range(self.problem.number_of_exams):
+            self.model += LpAffineExpression([(self.exam_room_choice[(e, r)], 1) for r in self.rooms_for[e]]) == 1
+
+        # Find exam pairs that share at least one student
+        conflicts = set()
+        for student_exams in self.student_to_exams.values():
+            for i, a in enumerate(student_exams):
+                for b in student_exams[i + 1:]:
+                    conflicts.add((min(a, b), max(a, b)))
+
+        # Binary per constrained pair choosing which exam of the pair comes first
+        order = {}
+
+        # Constraint: Students need a free slot between their exams, |t_a - t_b| >= 2
+        # Rows are built from (variable, coefficient) pairs with the big-M constants moved to the right-hand side
+        big_m = number_of_slots + 1
+        for a, b in sorted(conflicts):
+            order[(a, b)] = LpVariable(name=f'order_{a}_{b}', cat=LpBinary)
+            # t_a - t_b >= 2 - M * (1 - order)
+            self.model += LpAffineExpression(
+                [(self.exam_time[a], 1), (self.exam_time[b], -1), (order[(a, b)], -big_m)]) >= 2 - big_m
+            # t_b - t_a >= 2 - M * order
+            self.model += LpAffineExpression(
+                [(self.exam_time[b], 1), (self.exam_time[a], -1), (order[(a, b)], big_m)]) >= 2
+
+        # Constraint: Exams placed in the same room take different slots (conflicting pairs already do)
+        for a in range(self.problem.number_of_exams):
+            for b in range(a + 1, self.problem.number_of_exams):
+                shared_rooms = set(self.rooms_for[a]) & set(self.rooms_for[b])
+                if (a, b) in conflicts or not shared_rooms:
+                    continue
+                order[(a, b)] = LpVariable(name=f'order_{a}_{b}', cat=LpBinary)
+                for r in sorted(shared_rooms):
+                    # apart = 2 - y_a - y_b is zero exactly when both exams are in room r; otherwise it
+                    # switches the pair off. Room choices y enter both rows with coefficient -T
+                    room_terms = [(self.exam_room_choice[(a, r)], -number_of_slots),
+                                  (self.exam_room_choice[(b, r)], -number_of_slots)]
+                    # t_a - t_b >= 1 - T * (1 - order) - T * apart
+                    self.model += LpAffineExpression(
+                        [(self.exam_time[a], 1), (self.exam_time[b], -1), (order[(a, b)], -number_of_slots)]
+                        + room_terms) >= 1 - 3 * number_of_slots
+                    # t_b - t_a >= 1 - T * order - T * apart
+                    self.model += LpAffineExpression(
+                        [(self.exam_time[b], 1), (self.exam_time[a], -1), (order[(a, b)], number_of_slots)]
+                        + room_terms) >= 1 - 2 * number_of_slots
+
+        # Symmetry breaking: interchangeable exams and rooms otherwise give CBC many equivalent subtrees
+        exam_groups, room_groups = self._symmetry_groups() if self.symmetry_breaking else ([], [])
+        for group in exam_groups:
+            # Exams with identical students take non-decreasing time slots in index order
+            for a, b in zip(group, group[1:]):
+                self.model += LpAffineExpression([(self.exam_time[a], 1), (self.exam_time[b], -1)]) <= 0
+        for group in room_groups:
+            # Among rooms of equal capacity, the k-th exam that fits them may only use the first k + 1
+            group_exams = [e for e in range(self.problem.number_of_exams) if group[0] in self.rooms_for[e]]
+            for rank, e in enumerate(group_exams):
+                for r in group[rank + 1:]:
+                    self.exam_room_choice[(e, r)].upBound = 0
+
+        # Objective function: Minimize total time slots used
+        self.model += LpAffineExpression([(v, 1) for v in self.exam_time])
+
+        # Seed CBC with a greedy feasible timetable as its first incumbent when one exists
+        initial_solution = greedy_assign(self.problem)
+        if initial_solution is not None:
+            initial_slots, initial_rooms = self._canonical_start(initial_solution, exam_groups, room_groups)
+            for e, variable in enumerate(self.exam_time):
+                variable.setInitialValue(initial_slots[e])
+            for (e, r), variable in self.exam_room_choice.items():
+                variable.setInitialValue(1 if initial_rooms[e] == r else 0)
+            for (a, b), variable in order.items():
+                variable.setInitialValue(1 if initial_slots[a] > initial_slots[b] else 0)
+
+        # Accept an optimal result, or a run stopped early that still holds an incumbent
+        if not self._run_cbc(warm_start=initial_solution is not None):
+            return None
+
+        # Extract exam assignments
+        solution = []
+        for e in range(self.problem.number_of_exams):
+            time_slot = self.exam_time[e].varValue
+            room = next((r for r in self.rooms_for[e] if (self.exam_room_choice[(e, r)].varValue or 0) > 0.5), None)
+            # Return None if any exam is not assigned
+            if time_slot is None or room is None:
+                return None
+            solution.append({
+                'examId': e,
+                'room': room,
+                'timeSlot': int(round(time_slot))
+            })
+
+        return solution
+
+    # Move a timetable into the canonical form the symmetry-breaking rows allow, as per-exam slot and room lists:
+    # sort identical exams' placements by slot, then relabel equal rooms in order of first use
+    def _canonical_start(self, solution, exam_groups, room_groups):
+        slots = [a['timeSlot'] for a in solution]
+        rooms = [a['room'] for a in solution]
+        for group in exam_groups:
+            placements = sorted((slots[e], rooms[e]) for e in group)
+            for e, (t, r) in zip(group, placements):
+                slots[e], rooms[e] = t, r
+        for group in room_groups:
+            relabel = {}
+            for e in range(self.problem.number_of_exams):
+                if rooms[e] in group:
+                    if rooms[e] not in relabel:
+                        relabel[rooms[e]] = group[len(relabel)]
+                    rooms[e] = relabel[rooms[e]]
+        return slots, rooms
+
+    # Find groups of interchangeable exams (same students) and rooms (same capacity), each in index order
+    def _symmetry_groups(self):
+        exams_by_students = defaultdict(list)
+        for e, exam in enumerate(self.problem.exams):
+            exams_by_students[frozenset(exam.students)].append(e)
+        rooms_by_capacity = defaultdict(list)
+        for r, capacity in enumerate(self.room_capacity.tolist()):
+            rooms_by_capacity[capacity].append(r)
+
+        # Only groups with more than one member carry any symmetry
+        exam_groups = [group for group in exams_by_students.values() if len(group) > 1]
+        room_groups = [group for group in rooms_by_capacity.values() if len(group) > 1]
+        return exam_groups, room_groups
+
+    # Solve with one binary per (exam, room, slot) on a shape-cached model
+    def _solve_binary(self) -> list[dict[str, int | Any]] | None:
+        # Add this instance's rows to a fresh copy of the cached rows, leaving the cached model untouched;
+        # the variables stay shared, so their bounds and start values are all reset below before running
+        self.model = self.shape_model.deepcopy()
+
+        # (exam, room) pairs where the exam fits the room; an exam that fits nowhere cannot be scheduled
+        fits = self.exam_size[:, None] <= self.room_capacity[None, :]
+        if self.problem.number_of_exams and (self.problem.number_of_slots == 0 or not fits.any(axis=1).all()):
+            return None
+
+        # Fix assignments to rooms that are too small at zero so presolve drops them immediately,
+        # restoring the bound on shared variables where a previous solve fixed them
+        for (e, r), fit in np.ndenumerate(fits):
+            for variable in self.exam_assignment[e, r]:
+                variable.upBound = 1 if fit else 0
+
+        # Symmetry breaking: among rooms of equal capacity, the k-th exam that fits them may only use the first k + 1
+        exam_groups, room_groups = self._symmetry_groups() if self.symmetry_breaking else ([], [])
+        for group in room_groups:
+            for rank, e in enumerate(np.flatnonzero(fits[:, group[0]]).tolist()):
+                for r in group[rank + 1:]:
+                    for variable in self.exam_assignment[e, r]:
+                        variable.upBound = 0
+
+        # Constraint: Ensure room capacity is not exceeded, summing only over exams that fit the room
+        for r in range(self.problem.number_of_rooms):
+            room_exams = np.flatnonzero(fits[:, r])
+            if room_exams.size == 0:
+                continue
+            room_exam_sizes = self.exam_size[room_exams].tolist()
+            for t in range(self.problem.number_of_slots):
+                self.model += LpAffineExpression(
+                    list(zip(self.exam_assignment[room_exams, r, t].tolist(), room_exam_sizes))
+                ) <= int(self.room_capacity[r]), f'capacity_room_{r}_time_{t}'
+
+        # Constraint: Handle student conflicts; students with fewer than two exams cannot clash
+        for student, student_exams in self.student_to_exams.items():
+            if len(student_exams) < 2:
+                continue
+
+            # Constraint: No same time slot for a student's exams
+            for t in range(self.problem.number_of_slots):
+                self.model += LpAffineExpression(
+                    [(v, 1) for v in self.exam_slot[student_exams, t].tolist()]
+                ) <= 1, f'student_{student}_time_{t}'
+
+            # Constraint: No consecutive time slots for a student's exams
+            for t in range(self.problem.number_of_slots - 1):
+                self.model += LpAffineExpression(
+                    [(v, 1) for v in self.exam_slot[student_exams, t:t + 2].ravel().tolist()]
+                ) <= 1, f'student_{student}_times_{t}_{t + 1}'
+
+        # Constraint: Exams with identical students take non-decreasing time slots in index order
+        slot_numbers = list(range(self.problem.number_of_slots))
+        for group in exam_groups:
+            for a, b in zip(group, group[1:]):
+                self.model += LpAffineExpression(
+                    list(zip(self.exam_slot[a].tolist(), slot_numbers))
+                    + [(v, -t) for v, t in zip(self.exam_slot[b].tolist(), slot_numbers)]
+                ) <= 0, f'symmetry_exams_{a}_{b}'
+
+        # Seed CBC with a greedy feasible timetable as its first incumbent when one exists
+        initial_solution = greedy_assign(self.problem)
+        if initial_solution is not None:
+            initial_slots, initial_rooms = self._canonical_start(initial_solution, exam_groups, room_groups)
+            initial_cells = {(e, initial_rooms[e], initial_slots[e]) for e in range(self.problem.number_of_exams)}
+            for key, variable in np.ndenumerate(self.exam_assignment):
+                variable.setInitialValue(1 if key in initial_cells else 0)
+            initial_exam_slots = set(enumerate(initial_slots))
+            for key, variable in np.ndenumerate(self.exam_slot):
+                variable.setInitialValue(1 if key in initial_exam_slots else 0)
+        else:
+            # Clear values left on shared variables so a stopped run cannot return a stale timetable
+            for variable in self.model.variables():
+                variable.varValue = None
+
+        # Accept an optimal result, or a run stopped early that still holds an incumbent
+        if not self._run_cbc(warm_start=initial_solution is not None):
+            return None
+
+        # Pull every assignment value once, then take each exam's strongest (room, slot) cell
+        number_of_exams, number_of_rooms, number_of_slots = self.exam_assignment.shape
+        values = np.fromiter((variable.varValue or 0.0 for variable in self.exam_assignment.ravel().tolist()),
+                             dtype=np.float32, count=self.exam_assignment.size
+                             ).reshape(number_of_exams, number_of_rooms * number_of_slots)
+        best_cells = values.argmax(axis=1)
+        # Return None if any exam is not assigned
+        if (values[np.arange(number_of_exams), best_cells] < 0.5).any():
+            return None
+
+        rooms, time_slots = np.divmod(best_cells, number_of_slots)
+        return [{'examId': e, 'room': r, 'timeSlot': t}
+                for e, (r, t) in enumerate(zip(rooms.tolist(), time_slots.tolist()))]
+
+    # Run CBC on the built model and report whether it produced a usable result
+    def _run_cbc(self, warm_start: bool) -> bool:
+        # Hand the model to an in-process backend when one is available; it keeps no warm start
+        if self.backend is not None:
+            solver = getSolver(self.backend, msg=False, timeLimit=self.time_limit, gapRel=self.mip_gap,
+                               threads=solver_threads())
+            self.model.solve(solver)
+            # Accept an optimal result, or a run stopped early that still holds an integer feasible incumbent
+            return self.model.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible)
+
+        # PuLP's bundled CBC command supplies the executable path, status parsing and warm start writer
+        solver = PULP_CBC_CMD(msg=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            mps_path = os.path.join(directory, 'model.mps')
+            start_path = os.path.join(directory, 'start.mst')
+            solution_path = os.path.join(directory, 'model.sol')
+
+            # Write the model once as MPS with short generated names
+            variables, variable_names, constraint_names, _ = self.model.writeMPS(mps_path, rename=1)
+
+            # Run CBC with parallel branch-and-bound and a stopping rule, with presolve, preprocessing,
+            # cut generation and primal heuristics all switched on
+            args = [solver.path, mps_path]
+            if warm_start:
+                solver.writesol(start_path, self.model, variables, variable_names, constraint_names)
+                args += ['-mips', start_path]
+            args += ['-sec', str(self.time_limit), '-ratio', str(self.mip_gap),
+                     '-threads', str(solver_threads()),
+                     '-presolve', 'on', '-preprocess', 'on', '-cuts', 'on', '-heuristics', 'on',
+                     '-solve', '-solution', solution_path]
+            subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, check=True)
+
+            # The solution file lists only nonzero columns as "index name value reduced_cost",
+            # after a status line; infeasible entries are prefixed with "**"
+            _, sol_status = solver.get_status(solution_path)
+            values = {}
+            with open(solution_path) as solution_file:
+                next(solution_file, None)
+                for line in solution_file:
+                    fields = line.split()
+                    if fields and fields[0] == '**':
+                        fields = fields[1:]
+                    if len(fields) >= 3:
+                        values[fields[1]] = float(fields[2])
+
+        # Read values straight back onto the variables; columns CBC did not print are zero
+        for variable in variables:
+            variable.varValue = values.get(variable_names[variable.name], 0.0)
+
+        # Accept an optimal result, or a run stopped early that still holds an integer feasible incumbent;
+        # a run stopped with no integer solution leaves fractional or empty values behind
+        return sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible)
@@ -2,15 +2,43 @@
 from deap import base, creator, tools, algorithms
 # Import random number generation for genetic algorithm operations
 import random
+# Import process pool for evolving island populations in parallel
+from concurrent.futures import ProcessPoolExecutor
+# Import repeat to pass shared arguments to every island
+from itertools import repeat
+# Import multiprocessing to spawn island workers
+import multiprocessing
 # Import type hinting support
 from typing import Any, List, Dict
+# Import numpy for flat integer views of individuals and problem data
+import numpy as np
+# Import numba thread count to size per-worker scratch buffers
+from numba import get_num_threads
 # Import base solver and scheduling problem classes
 from utilities import BaseSolver, SchedulingProblem
-# Import various constraint classes for exam scheduling
-from conditioning import SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, MorningSessionPreferenceConstraint, \
-    ExamGroupSizeOptimizationConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, BreakPeriodConstraint, InvigilatorBreakConstraint
+# Import the builder for active constraint instances
+from conditioning import build_constraints
+# Import compiled fitness kernels
+from utilities.kernels import individual_penalty, population_penalties
+
+
+# Create a fitness class for minimization problem, once per process
+if not hasattr(creator, "FitnessMin"):
+    creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+# Create an individual class representing a potential solution, once per process: an int32 array holding
+# every exam's room in its first half and every exam's time slot in its second half
+if not hasattr(creator, "Individual"):
+    creator.create("Individual", np.ndarray, fitness=creator.FitnessMin)
+
+
+# Evolve one island in a worker process and return its best chromosome and penalty
+def _evolve_island(problem, active_constraints, population_size, generations, seed):
+    # Build the solver inside the worker, with its own random streams so islands explore differently
+    random.seed(seed)
+    solver = DEAPSolver(problem, active_constraints)
+    solver.rng = np.random.default_rng(seed)
+    best_ind = solver._evolve(population_size, generations)
+    return best_ind.tolist(), best_ind.fitness.values[0]
 
 
 # Define a solver class using Genetic Algorithm (DEAP library)
@@ -18,156 +46,237 @@ class DEAPSolver(BaseSolver):
     """Genetic Algorithm Solver using DEAP"""
 
     # Initialize the solver with a scheduling problem and optional active constraints
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, islands: int = 1):
         # Store the scheduling problem instance
         self.problem = problem
-        # Create a fitness class for minimization problem
-        creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-        # Create an individual class representing a potential solution
-        creator.create("Individual", list, fitness=creator.FitnessMin)
+        # Number of independent populations evolved in parallel processes; 1 evolves a single population in-process
+        self.islands = islands
+        # Keep the constraint selection so island workers can rebuild the solver
+        self.active_constraints = active_constraints
+
+        # Flat arrays of the problem data read by the compiled fitness kernel
+        self.exam_students_indptr, self.exam_students = problem.exam_students_csr
+        self.exam_size = np.fromiter((exam.get_student_count() for exam in problem.exams),
+                                     dtype=np.int32, count=problem.number_of_exams)
+        self.room_capacity = np.fromiter((room.capacity for room in problem.rooms),
+                                         dtype=np.int32, count=problem.number_of_rooms)
+        # Narrow sizes and capacities to int16 when they fit, halving the cache footprint of the hot lookups
+        if max(self.exam_size.max(initial=0), self.room_capacity.max(initial=0)) <= np.iinfo(np.int16).max:
+            self.exam_size = self.exam_size.astype(np.int16)
+            self.room_capacity = self.room_capacity.astype(np.int16)
+
+        # Per-worker scratch buffers for the fitness kernels: room loads, and each student's slot bitset
+        # A room load never exceeds the total enrolment, which the int32 CSR offsets already bound
+        workers = get_num_threads()
+        slot_words = (problem.number_of_slots + 63) // 64
+        self.room_usage = np.empty((workers, problem.number_of_rooms, problem.number_of_slots), dtype=np.int32)
+        self.student_bits = np.empty((workers, problem.total_students, slot_words), dtype=np.uint64)
+
+        # Random generator for vectorized mutation draws
+        self.rng = np.random.default_rng()
+        # Partial timetables kept per beam-search step, and placements tried for each, when seeding the population
+        self.beam_width = 32
+        self.beam_branching = 8
 
         # Create a toolbox for genetic algorithm operations
         self.toolbox = base.Toolbox()
         # Calculate total number of variables (room and time slot for each exam)
         self.n_vars = problem.number_of_exams * 2
 
-        # Register random generation of room assignments
-        self.toolbox.register("attr_room", random.randint, 0, problem.number_of_rooms - 1)
-        # Register random generation of time slot assignments
-        self.toolbox.register("attr_time", random.randint, 0, problem.number_of_slots - 1)
-        # Register method to create an individual (chromosome) with room and time slot for each exam
-        self.toolbox.register("individual", tools.initCycle, creator.Individual, (self.toolbox.attr_room, self.toolbox.attr_time), n=problem.number_of_exams)
+        # Register method to create an individual (chromosome) with a random room and time slot for each exam
+        self.toolbox.register("individual", self._random_individual)
         # Register method to create a population of individuals
         self.toolbox.register("population", tools.initRepeat, list, self.toolbox.individual)
 
         # Register genetic algorithm operators
         # Fitness evaluation function
         self.toolbox.register("evaluate", self._evaluate_individual)
-        # Crossover method (two-point crossover)
-        self.toolbox.register("mate", tools.cxTwoPoint)
+        # Evaluate each generation's unevaluated individuals in one compiled batch
+        self.toolbox.register("map", self._batched_map)
+        # Crossover method (uniform crossover over whole (room, time slot) exam blocks)
+        self.toolbox.register("mate", self._crossover_individuals)
         # Mutation method
         self.toolbox.register("mutate", self._mutate_individual)
         # Selection method (tournament selection)
         self.toolbox.register("select", tools.selTournament, tournsize=3)
 
-        # Initialize an empty list to store active constraints
-        self.constraints = []
-
-        # Create a mapping of constraint names to their corresponding constraint classes
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        # Set default core constraints if none are specified
-        if active_constraints is None:
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        # Add active constraints to the constraints list
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        # Instantiate the active constraints, defaulting to the core set
+        self.constraints = build_constraints(active_constraints)
+
+        # Load the compiled fitness kernels now, so the first solve() does not pay for it
+        if problem.number_of_rooms and problem.number_of_slots:
+            self.toolbox.map(self.toolbox.evaluate, [[0] * self.n_vars])
+            self.toolbox.evaluate([0] * self.n_vars)
 
     # Method to evaluate the fitness of an individual solution
     def _evaluate_individual(self, individual):
         """Evaluate fitness of an individual"""
-        # Initialize penalty score and tracking dictionaries
-        penalties = 0
-        room_usage = {}
-        student_slots = {}
-
-        # Iterate through individual's chromosome (alternating rooms and time slots)
-        for i in range(0, len(individual), 2):
-            # Calculate exam ID from chromosome index
-            exam_id = i // 2
-            # Extract room and time slot for this exam
-            room = individual[i]
-            time = individual[i + 1]
-
-            # Track room capacity
-            key = (room, time)
-            if key not in room_usage:
-                room_usage[key] = 0
-            # Add students for this exam to room usage
-            room_usage[key] += self.problem.exams[exam_id].get_student_count()
-            # Penalize if room capacity is exceeded
-            if room_usage[key] > self.problem.rooms[room].capacity:
-                penalties += 1000
-
-            # Track student time slots
-            for student in self.problem.exams[exam_id].students:
-                if student not in student_slots:
-                    student_slots[student] = []
-                student_slots[student].append(time)
-
-        # Check for student conflicts (exams too close together)
-        for slots in student_slots.values():
-            slots.sort()
-            for i in range(len(slots) - 1):
-                if slots[i + 1] - slots[i] < 2:
-                    penalties += 1000
-
-        # Return total penalty (lower is better)
-        return penalties
+        # Total penalty (lower is better), returned as DEAP's single-objective fitness tuple
+        penalty = individual_penalty(np.asarray(individual, dtype=np.int32),
+                                     self.exam_students_indptr, self.exam_students,
+                                     self.exam_size, self.room_capacity,
+                                     self.room_usage[0], self.student_bits[0])
+        return (penalty,)
+
+    # Batched replacement for the toolbox map used by the evolutionary loop
+    def _batched_map(self, func, individuals):
+        """Map func over individuals, scoring fitness evaluations as a single population matrix"""
+        individuals = list(individuals)
+        # Anything other than fitness evaluation, or an empty batch, falls back to the built-in map
+        if func is not self.toolbox.evaluate or not individuals:
+            return list(map(func, individuals))
+
+        # Stack chromosomes into a contiguous (population, 2 * exams) matrix
+        population = np.array(individuals, dtype=np.int32).reshape(len(individuals), self.n_vars)
+        penalties = population_penalties(population, self.exam_students_indptr, self.exam_students,
+                                          self.exam_size, self.room_capacity,
+                                          self.room_usage, self.student_bits)
+        return [(penalty,) for penalty in penalties.tolist()]
+
+    # Create a random chromosome: rooms for all exams, then time slots for all exams
+    def _random_individual(self):
+        rooms = self.rng.integers(0, self.problem.number_of_rooms, self.problem.number_of_exams, dtype=np.int32)
+        times = self.rng.integers(0, self.problem.number_of_slots, self.problem.number_of_exams, dtype=np.int32)
+        return creator.Individual(np.concatenate((rooms, times)))
+
+    # Custom crossover operator that keeps each exam's room and time slot together
+    def _crossover_individuals(self, ind1, ind2, indpb=0.5):
+        """Custom crossover operator"""
+        number_of_exams = self.problem.number_of_exams
+        # Swap each exam's room and time slot between the parents with probability indpb
+        swapped = np.flatnonzero(self.rng.random(number_of_exams) < indpb)
+        genes = np.concatenate((swapped, swapped + number_of_exams))
+        ind1[genes], ind2[genes] = ind2[genes], ind1[genes]
+        return ind1, ind2
 
     # Custom mutation operator to modify solutions
     def _mutate_individual(self, individual, indpb=0.05):
         """Custom mutation operator"""
-        # Iterate through chromosome, randomly mutating rooms and time slots
-        for i in range(0, len(individual), 2):
-            # Mutate room with small probability
-            if random.random() < indpb:
-                individual[i] = random.randint(0, self.problem.number_of_rooms - 1)
-            # Mutate time slot with small probability
-            if random.random() < indpb:
-                individual[i + 1] = random.randint(0, self.problem.number_of_slots - 1)
-        return individual
+        number_of_exams = self.problem.number_of_exams
+        # Rooms and time slots are contiguous halves of the chromosome, mutated in place
+        rooms, times = individual[:number_of_exams], individual[number_of_exams:]
+        # Mutate rooms with small probability
+        room_mask = self.rng.random(number_of_exams) < indpb
+        rooms[room_mask] = self.rng.integers(0, self.problem.number_of_rooms, room_mask.sum())
+        # Mutate time slots with small probability
+        time_mask = self.rng.random(number_of_exams) < indpb
+        times[time_mask] = self.rng.integers(0, self.problem.number_of_slots, time_mask.sum())
+        return individual,
+
+    # Build low-penalty starting chromosomes by beam search: place exams largest first, extending every kept partial
+    # timetable with its cheapest (room, slot) placements and keeping the cheapest partials overall
+    def _beam_seed(self):
+        number_of_exams = self.problem.number_of_exams
+        number_of_rooms = self.problem.number_of_rooms
+        number_of_slots = self.problem.number_of_slots
+        if not number_of_rooms or not number_of_slots:
+            return []
+        exam_size = self.exam_size.astype(np.int64)
+        room_capacity = self.room_capacity.astype(np.int64)[:, None]
+
+        # Each partial: (penalty so far, rooms, time slots, students seated per (room, slot), slots each student sits)
+        beam = [(0, np.zeros(number_of_exams, dtype=np.int32), np.zeros(number_of_exams, dtype=np.int32),
+                 np.zeros((number_of_rooms, number_of_slots), dtype=np.int64),
+                 np.zeros((self.problem.total_students, number_of_slots), dtype=bool))]
+        for e in np.argsort(-exam_size, kind='stable'):
+            exam_students = self.exam_students[self.exam_students_indptr[e]:self.exam_students_indptr[e + 1]]
+            candidates = []
+            for parent, (penalty, _, _, room_usage, student_slots) in enumerate(beam):
+                # Students of this exam already sitting the same or an adjacent slot
+                busy = student_slots[exam_students].sum(axis=0)
+                clashes = busy.copy()
+                clashes[1:] += busy[:-1]
+                clashes[:-1] += busy[1:]
+                # Penalty of each placement, matching the fitness kernel's 1000 per violation
+                step = 1000 * ((room_usage + exam_size[e] > room_capacity) + clashes[None, :])
+                # Cheapest placements first, then unoccupied cells, then the tightest room so large rooms stay free
+                fit = np.broadcast_to(np.abs(room_capacity - exam_size[e]), step.shape)
+                best = np.lexsort((fit.ravel(), (room_usage > 0).ravel(), step.ravel()))[:self.beam_branching]
+                candidates.extend((penalty + int(step.flat[cell]), parent, cell) for cell in best.tolist())
+
+            # Keep the cheapest extensions, materializing state only for the survivors
+            candidates.sort(key=lambda candidate: candidate[0])
+            next_beam = []
+            for penalty, parent, cell in candidates[:self.beam_width]:
+                room, time_slot = divmod(cell, number_of_slots)
+                _, rooms, times, room_usage, student_slots = beam[parent]
+                rooms, times = rooms.copy(), times.copy()
+                rooms[e], times[e] = room, time_slot
+                room_usage = room_usage.copy()
+                room_usage[room, time_slot] += exam_size[e]
+                student_slots = student_slots.copy()
+                student_slots[exam_students, time_slot] = True
+                next_beam.append((penalty, rooms, times, room_usage, student_slots))
+            beam = next_beam
+
+        return [creator.Individual(np.concatenate((rooms, times))) for _, rooms, times, _, _ in beam]
 
     # Static method to return the solver name
     @staticmethod
     def get_solver_name() -> str:
         return 'DEAP Solver'
 
+    # Run the genetic algorithm on one population and return its best individual
+    def _evolve(self, population_size: int, generations: int):
+        # Create the initial population: beam-search seeds, topped up with random chromosomes
+        pop = self._beam_seed()[:population_size]
+        pop += self.toolbox.population(n=population_size - len(pop))
+
+        # Best chromosome seen so far; chromosomes are arrays, so they are compared by value
+        hall_of_fame = tools.HallOfFame(1, similar=np.array_equal)
+
+        # Evaluate the initial population
+        for ind, fit in zip(pop, self.toolbox.map(self.toolbox.evaluate, pop)):
+            ind.fitness.values = fit
+        hall_of_fame.update(pop)
+
+        # Run the simple genetic algorithm loop of algorithms.eaSimple, stopping once a zero-penalty timetable exists
+        for _ in range(generations):
+            if hall_of_fame[0].fitness.values[0] == 0:
+                break
+            # Select the next generation and vary it
+            offspring = self.toolbox.select(pop, len(pop))
+            offspring = algorithms.varAnd(offspring, self.toolbox,
+                                          cxpb=0.7,  # 70% crossover probability
+                                          mutpb=0.2)  # 20% mutation probability
+            # Evaluate the individuals whose fitness was invalidated by variation
+            invalid = [ind for ind in offspring if not ind.fitness.valid]
+            for ind, fit in zip(invalid, self.toolbox.map(self.toolbox.evaluate, invalid)):
+                ind.fitness.values = fit
+            hall_of_fame.update(offspring)
+            pop[:] = offspring
+
+        # Return the best individual found in any generation
+        return hall_of_fame[0]
+
     # Method to solve the exam scheduling problem using genetic algorithm
     def solve(self) -> List[Dict[str, int]] | None:
         try:
-            # Create initial population of 300 individuals
-            pop = self.toolbox.population(n=300)
-
-            # Run simple genetic algorithm
-            algorithms.eaSimple(pop, self.toolbox,
-                                cxpb=0.7,  # 70% crossover probability
-                                mutpb=0.2,  # 20% mutation probability
-                                ngen=100,  # 100 generations
-                                verbose=False)
-
-            # Select the best individual from final population
-            best_ind = tools.selBest(pop, 1)[0]
-            fitness = best_ind.fitness.values[0]
+            if self.islands > 1:
+                # Evolve independent islands in parallel processes, splitting the 100 generations between them,
+                # and keep the best chromosome found on any island
+                # Workers are spawned rather than forked, since forking after Numba's thread pool has started is unsafe
+                seeds = [random.randrange(2 ** 32) for _ in range(self.islands)]
+                with ProcessPoolExecutor(max_workers=self.islands,
+                                         mp_context=multiprocessing.get_context('spawn')) as executor:
+                    results = list(executor.map(_evolve_island, repeat(self.problem), repeat(self.active_constraints),
+                                                repeat(300), repeat(max(1, 100 // self.islands)), seeds))
+                best_ind, fitness = min(results, key=lambda result: result[1])
+            else:
+                # Evolve a population of 300 individuals for 100 generations
+                best_ind = self._evolve(300, 100)
+                fitness = best_ind.fitness.values[0]
 
             # If a valid solution is found (zero penalties)
             if fitness == 0:  # Valid solution found
                 solution = []
-                # Convert chromosome to exam assignments
-                for i in range(0, len(best_ind), 2):
+                # Convert chromosome halves to exam assignments
+                rooms, times = best_ind[:self.problem.number_of_exams], best_ind[self.problem.number_of_exams:]
+                for e, (room, time_slot) in enumerate(zip(rooms, times)):
                     solution.append({
-                        'examId': i // 2,
-                        'room': best_ind[i],
-                        'timeSlot': best_ind[i + 1]
+                        'examId': e,
+                        'room': int(room),
+                        'timeSlot': int(time_slot)
                     })
                 return solution
 
@@ -4,79 +4,104 @@ import gurobipy as gp
 from typing import Any, List
 
 # Import base solver and scheduling problem classes
-from utilities import BaseSolver, SchedulingProblem
-# Import various constraint classes for exam scheduling
-from conditioning import IConstraint, SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, MorningSessionPreferenceConstraint, ExamGroupSizeOptimizationConstraint, \
-    BreakPeriodConstraint, InvigilatorBreakConstraint
+from utilities import BaseSolver, SchedulingProblem, LRUCache, greedy_assign, solver_threads
+# Import the builder for active constraint instances
+from conditioning import build_constraints
+
+
+# Fully built models keyed by (problem topology, constraint classes, formulation), each stored with the
+# room capacities it was built for
+_model_cache = LRUCache()
 
 
 # Define a solver class using Gurobi optimization solver
 class GurobiSolver(BaseSolver):
     # Initialize the solver with a scheduling problem and optional active constraints
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, formulation: str = 'compact'):
         # Store the scheduling problem instance
         self.problem = problem
-        # Create a Gurobi optimization model
-        self.model = gp.Model("AssessmentScheduler")
-        # Suppress Gurobi's default output messages
-        self.model.setParam('OutputFlag', 0)
-
-        # Initialize dictionaries to store decision variables for exam times and rooms
-        self.exam_time = {}
-        self.exam_room = {}
-        # Create decision variables for each exam's time slot and room
-        for e in range(problem.number_of_exams):
-            # Add integer variable for exam time slot with bounds
-            self.exam_time[e] = self.model.addVar(
+        # 'compact' uses one integer time and room per exam; 'binary' also channels them from one-hot choices
+        self.formulation = formulation
+
+        # Instantiate the active constraints, defaulting to the core set
+        self.constraints = build_constraints(active_constraints)
+
+        # Start from a copy of the model already built for this problem shape and constraint set, if any
+        self.cache_key = (problem.topology_key(), tuple(type(constraint).__name__ for constraint in self.constraints),
+                          formulation)
+        self.room_capacity = tuple(room.capacity for room in problem.rooms)
+        cached = _model_cache.get(self.cache_key)
+        self.model_built = cached is not None
+        if self.model_built:
+            cached_capacity, cached_model = cached
+            self.model = cached_model.copy()
+            self._bind_variables()
+            # Only capacity rows depend on room capacities: retarget the ones whose room changed
+            for r, (old, new) in enumerate(zip(cached_capacity, self.room_capacity)):
+                if old == new:
+                    continue
+                for t in range(problem.number_of_slots):
+                    row = self.model.getConstrByName(f'capacity_{r}_{t}')
+                    if row is not None:
+                        row.RHS = new
+        else:
+            # Create a Gurobi optimization model
+            self.model = gp.Model("AssessmentScheduler")
+            # Suppress Gurobi's default output messages
+            self.model.setParam('OutputFlag', 0)
+
+            # Create decision variables for each exam's time slot and room, each family as one block indexed by exam
+            # Integer time slot variable per exam, bounded by the first and last time slot
+            self.exam_time = self.model.addVars(
+                problem.number_of_exams,
                 vtype=gp.GRB.INTEGER,  # Integer variable type
                 lb=0,  # Lower bound (first time slot)
                 ub=problem.number_of_slots - 1,  # Upper bound (last time slot)
-                name=f'exam_{e}_time'  # Variable name
+                name='exam_time'  # Variable name prefix
             )
-            # Add integer variable for exam room with bounds
-            self.exam_room[e] = self.model.addVar(
+            # Integer room variable per exam, bounded by the first and last room
+            self.exam_room = self.model.addVars(
+                problem.number_of_exams,
                 vtype=gp.GRB.INTEGER,  # Integer variable type
                 lb=0,  # Lower bound (first room)
                 ub=problem.number_of_rooms - 1,  # Upper bound (last room)
-                name=f'exam_{e}_room'  # Variable name
+                name='exam_room'  # Variable name prefix
             )
 
-        # Initialize an empty list to store active constraints
-        self.constraints = []
-
-        # Create a mapping of constraint names to their corresponding constraint classes
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        # Set default core constraints if none are specified
-        if active_constraints is None:
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        # Add active constraints to the constraints list
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
-
-        # Update the model to incorporate added variables
-        self.model.update()
+            if formulation == 'binary':
+                # One-hot slot and room choices per exam, whose LP relaxation is much tighter than the integers alone
+                self.exam_slot_choice = self.model.addVars(
+                    problem.number_of_exams, problem.number_of_slots, vtype=gp.GRB.BINARY, name='exam_slot_choice')
+                self.exam_room_choice = self.model.addVars(
+                    problem.number_of_exams, problem.number_of_rooms, vtype=gp.GRB.BINARY, name='exam_room_choice')
+                # Each exam takes exactly one slot and one room
+                self.model.addConstrs((self.exam_slot_choice.sum(e, '*') == 1
+                                       for e in range(problem.number_of_exams)), name='one_slot')
+                self.model.addConstrs((self.exam_room_choice.sum(e, '*') == 1
+                                       for e in range(problem.number_of_exams)), name='one_room')
+                # Channel the choices into the integer variables, so constraints written against them still apply
+                self.model.addConstrs((self.exam_time[e] == gp.quicksum(
+                    t * self.exam_slot_choice[e, t] for t in range(problem.number_of_slots))
+                                       for e in range(problem.number_of_exams)), name='time_channel')
+                self.model.addConstrs((self.exam_room[e] == gp.quicksum(
+                    r * self.exam_room_choice[e, r] for r in range(problem.number_of_rooms))
+                                       for e in range(problem.number_of_exams)), name='room_channel')
+
+            # Update the model to incorporate added variables
+            self.model.update()
+
+    # Look up the decision variables of a copied model by name
+    def _bind_variables(self):
+        number_of_exams = self.problem.number_of_exams
+        self.exam_time = gp.tupledict({e: self.model.getVarByName(f'exam_time[{e}]') for e in range(number_of_exams)})
+        self.exam_room = gp.tupledict({e: self.model.getVarByName(f'exam_room[{e}]') for e in range(number_of_exams)})
+        if self.formulation == 'binary':
+            self.exam_slot_choice = gp.tupledict({
+                (e, t): self.model.getVarByName(f'exam_slot_choice[{e},{t}]')
+                for e in range(number_of_exams) for t in range(self.problem.number_of_slots)})
+            self.exam_room_choice = gp.tupledict({
+                (e, r): self.model.getVarByName(f'exam_room_choice[{e},{r}]')
+                for e in range(number_of_exams) for r in range(self.problem.number_of_rooms)})
 
     # Static method to return the solver name
     @staticmethod
@@ -86,40 +111,71 @@ class GurobiSolver(BaseSolver):
     # Method to solve the exam scheduling problem using Gurobi
     def solve(self) -> list[dict[str, int | Any]] | None:
         try:
-            # Apply all active constraints to the model
-            for constraint in self.constraints:
-                constraint.apply_gurobi(self.model, self.problem, self.exam_time, self.exam_room)
-
-            # Create auxiliary variables to help spread exams across time slots
-            # Add variable to track maximum exam time
-            max_time = self.model.addVar(
-                vtype=gp.GRB.INTEGER,
-                lb=0,
-                ub=self.problem.number_of_slots - 1,
-                name='max_time'
-            )
-            # Add variable to track minimum exam time
-            min_time = self.model.addVar(
-                vtype=gp.GRB.INTEGER,
-                lb=0,
-                ub=self.problem.number_of_slots - 1,
-                name='min_time'
-            )
-
-            # Add constraints to link min/max variables to actual exam times
-            for e in range(self.problem.number_of_exams):
-                # Ensure max_time is greater than or equal to each exam time
-                self.model.addConstr(max_time >= self.exam_time[e], name=f'max_time_constr_{e}')
-                # Ensure min_time is less than or equal to each exam time
-                self.model.addConstr(min_time <= self.exam_time[e], name=f'min_time_constr_{e}')
-
-            # Set objective to minimize the spread of exam times (max time - min time)
-            self.model.setObjective(max_time - min_time, gp.GRB.MINIMIZE)
-
-            # Set solver parameters for optimization
-            self.model.setParam('TimeLimit', 30)  # Maximum solving time of 30 seconds
-            self.model.setParam('MIPGap', 0.1)  # Allow 10% gap from optimal solution
-            self.model.setParam('IntFeasTol', 1e-5)  # Integer feasibility tolerance
+            if self.model_built:
+                # Reuse the spread variables of the cached model
+                max_time = self.model.getVarByName('max_time')
+                min_time = self.model.getVarByName('min_time')
+            else:
+                # Apply all active constraints to the model
+                for constraint in self.constraints:
+                    constraint.apply_gurobi(self.model, self.problem, self.exam_time, self.exam_room)
+
+                # Create auxiliary variables to help spread exams across time slots
+                # Add variable to track maximum exam time
+                max_time = self.model.addVar(
+                    vtype=gp.GRB.INTEGER,
+                    lb=0,
+                    ub=self.problem.number_of_slots - 1,
+                    name='max_time'
+                )
+                # Add variable to track minimum exam time
+                min_time = self.model.addVar(
+                    vtype=gp.GRB.INTEGER,
+                    lb=0,
+                    ub=self.problem.number_of_slots - 1,
+                    name='min_time'
+                )
+
+                # Link min/max variables to actual exam times with general constraints, which Gurobi reformulates
+                # more tightly than one linear bound per exam
+                if self.problem.number_of_exams:
+                    # max_time equals the latest exam time
+                    self.model.addGenConstrMax(max_time, list(self.exam_time.values()), name='max_time_gc')
+                    # min_time equals the earliest exam time
+                    self.model.addGenConstrMin(min_time, list(self.exam_time.values()), name='min_time_gc')
+
+                # Set objective to minimize the spread of exam times (max time - min time)
+                self.model.setObjective(max_time - min_time, gp.GRB.MINIMIZE)
+
+                # Set solver parameters for optimization
+                self.model.setParam('TimeLimit', 30)  # Maximum solving time of 30 seconds
+                self.model.setParam('MIPGap', 0.1)  # Allow 10% gap from optimal solution
+                self.model.setParam('IntFeasTol', 1e-5)  # Integer feasibility tolerance
+                self.model.setParam('MIPFocus', 1)  # Favour finding feasible timetables over proving the bound
+                # Use every allowed thread, split between up to 4 concurrent MIP searches that each keep at least 2 threads
+                cores = solver_threads()
+                self.model.setParam('Threads', cores)
+                self.model.setParam('ConcurrentMIP', max(1, min(4, cores // 2)))
+
+                # Keep a copy of the finished model, before any solve state, for later solvers of this problem
+                self.model.update()
+                _model_cache.put(self.cache_key, (self.room_capacity, self.model.copy()))
+                self.model_built = True
+
+            # Seed Gurobi with a greedy feasible timetable as its first incumbent when one exists
+            initial_solution = greedy_assign(self.problem)
+            if initial_solution is not None:
+                for assignment in initial_solution:
+                    self.exam_time[assignment['examId']].Start = assignment['timeSlot']
+                    self.exam_room[assignment['examId']].Start = assignment['room']
+                    if self.formulation == 'binary':
+                        for t in range(self.problem.number_of_slots):
+                            self.exam_slot_choice[assignment['examId'], t].Start = int(t == assignment['timeSlot'])
+                        for r in range(self.problem.number_of_rooms):
+                            self.exam_room_choice[assignment['examId'], r].Start = int(r == assignment['room'])
+                times = [assignment['timeSlot'] for assignment in initial_solution]
+                max_time.Start = max(times, default=0)
+                min_time.Start = min(times, default=0)
 
             # Solve the optimization model
             self.model.optimize()
@@ -1,54 +1,86 @@
 from typing import List, Dict
-from collections import defaultdict
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 import random
+import threading
 import time
 
+import numpy as np
+from numba import get_num_threads
+
 from utilities import BaseSolver, SchedulingProblem
-from conditioning import IConstraint, SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, MorningSessionPreferenceConstraint, ExamGroupSizeOptimizationConstraint, \
-    BreakPeriodConstraint, InvigilatorBreakConstraint
+from utilities.kernels import timetable_penalty, timetable_move_deltas, greedy_place
+from conditioning import build_constraints
+
+
+# A candidate timetable as parallel arrays indexed by exam ID
+Solution = namedtuple('Solution', ['rooms', 'times'])
+
+# Solver owned by a walk worker process, built once by _init_walker
+_walker = None
+
+
+def _init_walker(problem, active_constraints, stopped):
+    """Build the worker's solver once, so walks do not re-send the problem or rebuild lookups,
+    attached to the stop flag shared by all walks"""
+    global _walker
+    _walker = LocalSearchSolver(problem, active_constraints)
+    _walker.stopped = stopped
+
+
+def _run_walk(seed, deadline):
+    """One restart in a worker process, with its own random stream"""
+    _walker.rng = random.Random(seed)
+    return _walker._run_attempt(deadline)
 
 
 class LocalSearchSolver(BaseSolver):
     """Improved Local Search Solver with Better Search Strategy"""
 
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, walks: int = 1, seed: int | None = None):
         self.problem = problem
+        self.active_constraints = active_constraints
+        self.walks = walks  # Restarts run in parallel processes; 1 runs them in-process one after another
+        self.rng = random.Random(seed)  # Solver-owned stream, so seeded runs are reproducible
+        self.seed_sequence = np.random.SeedSequence(seed)  # Source of independent per-walk seeds
         self.best_solution = None
         self.best_score = float('inf')
         self.max_attempts = 50  # Increased attempts
         self.max_iterations = 1000  # Increased iterations per attempt
+        self.tabu_tenure = 50  # Recently undone placements a walk will not move back to
+        self.stopped = threading.Event()  # Set once the caller has its result, so walks still running return
+
+        # Exam sizes and room capacities as flat arrays
+        self.exam_size = np.fromiter((exam.get_student_count() for exam in problem.exams),
+                                     dtype=np.int32, count=problem.number_of_exams)
+        self.room_capacity = np.fromiter((room.capacity for room in problem.rooms),
+                                         dtype=np.int32, count=problem.number_of_rooms)
+        # Exams by size (descending): the order exams are placed, scored and scanned in
+        self.exam_order = sorted(range(problem.number_of_exams),
+                                 key=lambda e: problem.exams[e].get_student_count(),
+                                 reverse=True)
+        # Flat inputs and scratch buffer for the compiled evaluator
+        self.exam_order_array = np.array(self.exam_order, dtype=np.int32)
+        self.student_exams_indptr, self.student_exams = problem.student_exams_csr
+        self.exam_students_indptr, self.exam_students = problem.exam_students_csr
+        self.room_usage = np.empty((problem.number_of_rooms, problem.number_of_slots), dtype=np.int64)
+        # Exams each student sits in each slot, reused by _validate_solution
+        self._busy_scratch = np.zeros((problem.total_students, problem.number_of_slots), dtype=np.uint8)
+        self.student_slots = np.empty((get_num_threads(), max(np.diff(self.student_exams_indptr).max(initial=0), 1)),
+                                      dtype=np.int32)
+        # conflicts[a, b] is True when exams a and b share a student
+        self.conflicts = np.zeros((problem.number_of_exams, problem.number_of_exams), dtype=bool)
+        for s in range(len(self.student_exams_indptr) - 1):
+            exams = self.student_exams[self.student_exams_indptr[s]:self.student_exams_indptr[s + 1]]
+            self.conflicts[np.ix_(exams, exams)] = True
+        np.fill_diagonal(self.conflicts, False)
+        # Rooms large enough for each exam; moves never try the others
+        self.feasible_rooms = [np.flatnonzero(self.room_capacity >= self.exam_size[e]).tolist()
+                               for e in range(problem.number_of_exams)]
 
         # Register only active constraints
-        self.constraints = []
-
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        if active_constraints is None:
-            # Use default core constraints if none specified
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        self.constraints = build_constraints(active_constraints)
 
     @staticmethod
     def get_solver_name() -> str:
@@ -56,227 +88,272 @@ class LocalSearchSolver(BaseSolver):
 
     def _generate_initial_solution(self):
         """Generate smarter initial solution"""
-        solution = []
-        room_usage = defaultdict(int)
-        student_slots = defaultdict(list)
-
-        # Sort exams by size (descending)
-        sorted_exams = sorted(range(self.problem.number_of_exams),
-                              key=lambda e: self.problem.exams[e].get_student_count(),
-                              reverse=True)
-
-        for exam_id in sorted_exams:
-            # Find best room and time slot
-            best_room = 0
-            best_time = 0
-            min_conflicts = float('inf')
-
-            exam_size = self.problem.exams[exam_id].get_student_count()
-            exam_students = self.problem.exams[exam_id].students
-
-            for r in range(self.problem.number_of_rooms):
-                if self.problem.rooms[r].capacity < exam_size:
-                    continue
-
-                for t in range(self.problem.number_of_slots):
-                    conflicts = 0
-                    # Check room capacity
-                    if room_usage[(r, t)] + exam_size > self.problem.rooms[r].capacity:
-                        continue
-
-                    # Check student conflicts
-                    for student in exam_students:
-                        if t in student_slots[student] or t - 1 in student_slots[student] or t + 1 in student_slots[student]:
-                            conflicts += 1
-
-                    if conflicts < min_conflicts:
-                        min_conflicts = conflicts
-                        best_room = r
-                        best_time = t
-
-            # Update tracking structures
-            room_usage[(best_room, best_time)] += exam_size
-            for student in exam_students:
-                student_slots[student].append(best_time)
-
-            solution.append({
-                'examId': exam_id,
-                'room': best_room,
-                'timeSlot': best_time
-            })
-
-        return solution
+        rooms = np.zeros(self.problem.number_of_exams, dtype=np.int32)
+        times = np.zeros(self.problem.number_of_exams, dtype=np.int32)
+        room_usage = np.zeros((self.problem.number_of_rooms, self.problem.number_of_slots), dtype=np.int64)
+        student_busy = np.zeros((self.problem.total_students, self.problem.number_of_slots), dtype=bool)
+        self._place_exams(rooms, times, self.exam_order, room_usage, student_busy)
+        return Solution(rooms, times)
+
+    def _place_exams(self, rooms, times, exams, room_usage, student_busy):
+        """Greedily place the given exams, in order, around those already recorded in room_usage and student_busy;
+        writes into rooms and times"""
+        greedy_place(rooms, times, np.asarray(exams, dtype=np.int32), self.exam_size, self.room_capacity,
+                     self.exam_students_indptr, self.exam_students, room_usage, student_busy)
+
+    def _lns_neighbor(self, solution, k=5):
+        """Large-neighbourhood move: unassign k exams, picked with probability rising with their conflict score,
+        and greedily re-insert them, largest first, around the rest of the timetable"""
+        room_load = self._room_load(solution)
+        exam_scores = self._exam_scores(solution, room_load)
+        candidates = list(self.exam_order)
+        weights = [exam_scores[exam_id] + 1 for exam_id in candidates]
+        relaxed = set()
+        while candidates and len(relaxed) < k:
+            i = self.rng.choices(range(len(candidates)), weights=weights)[0]
+            relaxed.add(candidates.pop(i))
+            weights.pop(i)
+
+        # Rebuild the placement state of the exams that stay fixed
+        rooms, times = solution.rooms.copy(), solution.times.copy()
+        kept = np.ones(self.problem.number_of_exams, dtype=bool)
+        kept[list(relaxed)] = False
+        room_usage = np.zeros_like(room_load)
+        np.add.at(room_usage, (rooms[kept], times[kept]), self.exam_size[kept])
+        student_busy = np.zeros((self.problem.total_students, self.problem.number_of_slots), dtype=bool)
+        enrolment_exams = np.repeat(np.arange(self.problem.number_of_exams), np.diff(self.exam_students_indptr))
+        fixed = kept[enrolment_exams]
+        student_busy[self.exam_students[fixed], times[enrolment_exams[fixed]]] = True
+
+        self._place_exams(rooms, times, [exam_id for exam_id in self.exam_order if exam_id in relaxed],
+                          room_usage, student_busy)
+        return Solution(rooms, times)
+
+    def _to_assignments(self, solution):
+        """Convert a solution to the list of exam assignments returned by solve()"""
+        return [{'examId': e, 'room': int(solution.rooms[e]), 'timeSlot': int(solution.times[e])}
+                for e in range(self.problem.number_of_exams)]
 
     def _evaluate_solution(self, solution):
         """Evaluate solution with weighted penalties"""
-        if not solution:
+        if not self.problem.number_of_exams:
             return float('inf')
 
-        penalties = 0
-        room_usage = defaultdict(int)
-        student_slots = defaultdict(list)
-
-        # Track assignments
-        for exam in solution:
-            exam_id = exam['examId']
-            room = exam['room']
-            time = exam['timeSlot']
-
-            # Bounds check
-            if (room < 0 or room >= self.problem.number_of_rooms or
-                time < 0 or time >= self.problem.number_of_slots):
-                return float('inf')
-
-            # Room capacity
-            students = self.problem.exams[exam_id].get_student_count()
-            capacity = self.problem.rooms[room].capacity
-
-            if room_usage[(room, time)] + students > capacity:
-                penalties += ((room_usage[(room, time)] + students - capacity) * 1000)
-            room_usage[(room, time)] += students
-
-            # Track student assignments
-            for student in self.problem.exams[exam_id].students:
-                student_slots[student].append(time)
+        # Bounds check
+        if (solution.rooms.min() < 0 or solution.rooms.max() >= self.problem.number_of_rooms or
+                solution.times.min() < 0 or solution.times.max() >= self.problem.number_of_slots):
+            return float('inf')
 
-        # Check student conflicts
-        for student, times in student_slots.items():
-            times.sort()
-            for i in range(len(times) - 1):
-                if times[i + 1] - times[i] < 2:
-                    penalties += 5000  # Higher penalty for student conflicts
+        return timetable_penalty(solution.rooms, solution.times, self.exam_order_array,
+                                 self.exam_size, self.room_capacity,
+                                 self.student_exams_indptr, self.student_exams, self.room_usage, 1000, 5000)
 
-        return penalties
+    def _room_load(self, solution):
+        """Students seated in each (room, slot)"""
+        room_load = np.zeros((self.problem.number_of_rooms, self.problem.number_of_slots), dtype=np.int64)
+        np.add.at(room_load, (solution.rooms, solution.times), self.exam_size)
+        return room_load
 
-    def _get_neighbors(self, solution):
-        """Generate neighbors with focused changes"""
-        neighbors = []
+    def _get_moves(self, solution, tabu=frozenset()):
+        """Generate neighboring moves, as (exam, room, time slot), with focused changes, skipping tabu moves"""
+        moves = []
+        room_load = self._room_load(solution)
 
         # Find problematic exams
-        exam_scores = defaultdict(int)
-        for exam in solution:
-            exam_id = exam['examId']
-            conflicts = self._check_exam_conflicts(exam_id, solution)
-            exam_scores[exam_id] = conflicts
+        exam_scores = self._exam_scores(solution, room_load)
 
         # Focus on most problematic exams
         problematic_exams = sorted(exam_scores.items(), key=lambda x: x[1], reverse=True)[:5]
 
+        # Only moves into rooms the exam fits, and into cells with space left for it
         for exam_id, _ in problematic_exams:
-            current_room = next(x['room'] for x in solution if x['examId'] == exam_id)
-            current_time = next(x['timeSlot'] for x in solution if x['examId'] == exam_id)
+            current_room = int(solution.rooms[exam_id])
+            current_time = int(solution.times[exam_id])
+            fits = room_load + self.exam_size[exam_id] <= self.room_capacity[:, None]
 
             # Try all rooms
-            for r in range(self.problem.number_of_rooms):
-                if r != current_room:
-                    new_sol = [dict(x) for x in solution]
-                    for x in new_sol:
-                        if x['examId'] == exam_id:
-                            x['room'] = r
-                    neighbors.append(new_sol)
+            for r in self.feasible_rooms[exam_id]:
+                if r != current_room and fits[r, current_time]:
+                    moves.append((exam_id, r, current_time))
 
             # Try all time slots
-            for t in range(self.problem.number_of_slots):
-                if t != current_time:
-                    new_sol = [dict(x) for x in solution]
-                    for x in new_sol:
-                        if x['examId'] == exam_id:
-                            x['timeSlot'] = t
-                    neighbors.append(new_sol)
+            if current_room in self.feasible_rooms[exam_id]:
+                for t in range(self.problem.number_of_slots):
+                    if t != current_time and fits[current_room, t]:
+                        moves.append((exam_id, current_room, t))
 
             # Try room and time slot combinations for worst cases
             if exam_scores[exam_id] > 1000:
-                for r in range(self.problem.number_of_rooms):
+                for r in self.feasible_rooms[exam_id]:
                     for t in range(self.problem.number_of_slots):
-                        if r != current_room and t != current_time:
-                            new_sol = [dict(x) for x in solution]
-                            for x in new_sol:
-                                if x['examId'] == exam_id:
-                                    x['room'] = r
-                                    x['timeSlot'] = t
-                            neighbors.append(new_sol)
-
-        return neighbors
-
-    def _check_exam_conflicts(self, exam_id, solution):
-        """Check conflicts for a specific exam"""
+                        if r != current_room and t != current_time and fits[r, t]:
+                            moves.append((exam_id, r, t))
+
+        return [move for move in moves if move not in tabu] if tabu else moves
+
+    def _exam_scores(self, solution, room_load):
+        """Conflict score of every exam, keyed in exam_order"""
+        exam_scores = defaultdict(int)
+        for exam_id in self.exam_order:
+            exam_scores[exam_id] = self._check_exam_conflicts(exam_id, solution, room_load)
+        return exam_scores
+
+    def _apply_move(self, solution, move):
+        """The solution with one exam moved; only the changed arrays are copied"""
+        exam_id, room, time_slot = move
+        rooms, times = solution.rooms, solution.times
+        if room != rooms[exam_id]:
+            rooms = rooms.copy()
+            rooms[exam_id] = room
+        if time_slot != times[exam_id]:
+            times = times.copy()
+            times[exam_id] = time_slot
+        return Solution(rooms, times)
+
+    def _score_moves(self, solution, score, moves):
+        """Scores of the solution after each move, from the change in only the cells and students it touches,
+        computed for the whole batch in parallel"""
+        # A solution out of bounds stays out of bounds after moving a single exam
+        if score == float('inf'):
+            return np.full(len(moves), score)
+        moves = np.array(moves, dtype=np.int64).reshape(-1, 3)
+        return score + timetable_move_deltas(solution.rooms, solution.times, moves,
+                                             self.exam_order_array, self.exam_size, self.room_capacity,
+                                             self.exam_students_indptr, self.exam_students,
+                                             self.student_exams_indptr, self.student_exams, self.student_slots,
+                                             1000, 5000)
+
+    def _check_exam_conflicts(self, exam_id, solution, room_load):
+        """Check conflicts for a specific exam, given the students seated per (room, slot)"""
         conflicts = 0
-        exam_data = next(x for x in solution if x['examId'] == exam_id)
-        room = exam_data['room']
-        time = exam_data['timeSlot']
+        room = solution.rooms[exam_id]
+        time = solution.times[exam_id]
 
         # Check room capacity
-        room_usage = sum(self.problem.exams[x['examId']].get_student_count()
-                         for x in solution
-                         if x['room'] == room and x['timeSlot'] == time)
-        if room_usage > self.problem.rooms[room].capacity:
+        if room_load[room, time] > self.room_capacity[room]:
             conflicts += 1000
 
-        # Check student conflicts
-        exam_students = self.problem.exams[exam_id].students
-        for other in solution:
-            if other['examId'] != exam_id:
-                if other['timeSlot'] == time:
-                    common_students = exam_students.intersection(
-                        self.problem.exams[other['examId']].students)
-                    if common_students:
-                        conflicts += 1000
-                elif abs(other['timeSlot'] - time) == 1:
-                    common_students = exam_students.intersection(
-                        self.problem.exams[other['examId']].students)
-                    if common_students:
-                        conflicts += 500
+        # Check student conflicts: 1000 per clashing exam in the same slot, 500 per one in an adjacent slot
+        clashing = self.conflicts[exam_id]
+        conflicts += 1000 * int(np.count_nonzero(clashing & (solution.times == time)))
+        conflicts += 500 * int(np.count_nonzero(clashing & (np.abs(solution.times - time) == 1)))
 
         return conflicts
 
-    def solve(self) -> List[Dict[str, int]] | None:
-        try:
-            start_time = time.time()
-            max_time = 60  # Increased timeout to 60 seconds
-
-            for attempt in range(self.max_attempts):
-                current_solution = self._generate_initial_solution()
+    def _run_attempt(self, deadline):
+        """One restart from the initial solution; returns the best improving (score, solution) found,
+        stopping early at a zero score"""
+        best_score, best_solution = float('inf'), None
+        current_solution = self._generate_initial_solution()
+        current_score = self._evaluate_solution(current_solution)
+
+        if current_score == 0:
+            return current_score, current_solution
+
+        # Placements the walk recently moved exams out of, oldest first, mirrored in a set for lookups
+        tabu, tabu_set = deque(), set()
+
+        for iteration in range(self.max_iterations):
+            if time.time() > deadline or self.stopped.is_set():
+                break
+
+            # Score each neighbor by its change from the current solution, keeping the first best
+            moves = self._get_moves(current_solution, tabu_set)
+            # No move fits anywhere: this restart is stuck
+            if not moves:
+                break
+            best_move = None
+            best_neighbor_score = float('inf')
+
+            scores = self._score_moves(current_solution, current_score, moves)
+            best = int(np.argmin(scores))
+            if scores[best] < best_neighbor_score:
+                best_move = moves[best]
+                best_neighbor_score = scores[best]
+
+            if best_neighbor_score >= current_score:
+                # No single move improves: try a large-neighbourhood move before giving up
+                neighbor = self._lns_neighbor(current_solution)
+                neighbor_score = self._evaluate_solution(neighbor)
+                if neighbor_score < current_score:
+                    current_solution, current_score = neighbor, neighbor_score
+                    if current_score < best_score:
+                        best_score, best_solution = current_score, current_solution
+                    if current_score == 0:
+                        break
+                # Try random move to escape local minimum
+                elif self.rng.random() < 0.1:  # 10% chance
+                    move = moves[self.rng.randrange(len(moves))]
+                    self._push_tabu(tabu, tabu_set, current_solution, move)
+                    current_solution = self._apply_move(current_solution, move)
+                    current_score = self._evaluate_solution(current_solution)
+                else:
+                    break
+            else:
+                # Only an accepted move is built and fully re-evaluated
+                self._push_tabu(tabu, tabu_set, current_solution, best_move)
+                current_solution = self._apply_move(current_solution, best_move)
                 current_score = self._evaluate_solution(current_solution)
 
+                if current_score < best_score:
+                    best_score, best_solution = current_score, current_solution
+
                 if current_score == 0:
-                    return current_solution
+                    break
+
+        return best_score, best_solution
+
+    def _push_tabu(self, tabu, tabu_set, solution, move):
+        """Make moving the exam back to its current placement tabu, forgetting the oldest entry past the tenure"""
+        exam_id = move[0]
+        reverse = (exam_id, int(solution.rooms[exam_id]), int(solution.times[exam_id]))
+        tabu.append(reverse)
+        tabu_set.add(reverse)
+        if len(tabu) > self.tabu_tenure:
+            expired = tabu.popleft()
+            if expired not in tabu:
+                tabu_set.discard(expired)
+
+    def _run_walks(self, deadline):
+        """Run the restarts across worker processes, yielding each (score, solution) as it completes"""
+        # Workers are spawned rather than forked, since forking after Numba's thread pool has started is unsafe
+        context = multiprocessing.get_context('spawn')
+        seeds = [int(child.generate_state(1)[0]) for child in self.seed_sequence.spawn(self.max_attempts)]
+        with context.Manager() as manager:
+            stopped = manager.Event()
+            executor = ProcessPoolExecutor(max_workers=self.walks, mp_context=context, initializer=_init_walker,
+                                           initargs=(self.problem, self.active_constraints, stopped))
+            try:
+                futures = [executor.submit(_run_walk, seed, deadline) for seed in seeds]
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # Once the caller stops early, stop the running walks and drop those not yet started
+                stopped.set()
+                executor.shutdown(wait=True, cancel_futures=True)
 
-                for iteration in range(self.max_iterations):
-                    if time.time() - start_time > max_time:
-                        break
+    def solve(self) -> List[Dict[str, int]] | None:
+        try:
+            max_time = 60  # Increased timeout to 60 seconds
+            deadline = time.time() + max_time
+
+            if self.walks > 1:
+                results = self._run_walks(deadline)
+            else:
+                results = (self._run_attempt(deadline) for _ in range(self.max_attempts))
 
-                    neighbors = self._get_neighbors(current_solution)
-                    best_neighbor = None
-                    best_neighbor_score = float('inf')
-
-                    for neighbor in neighbors:
-                        score = self._evaluate_solution(neighbor)
-                        if score < best_neighbor_score:
-                            best_neighbor = neighbor
-                            best_neighbor_score = score
-
-                    if best_neighbor_score >= current_score:
-                        # Try random move to escape local minimum
-                        if random.random() < 0.1:  # 10% chance
-                            current_solution = random.choice(neighbors)
-                            current_score = self._evaluate_solution(current_solution)
-                        else:
-                            break
-                    else:
-                        current_solution = best_neighbor
-                        current_score = best_neighbor_score
-
-                        if current_score < self.best_score:
-                            self.best_score = current_score
-                            self.best_solution = current_solution
-
-                        if current_score == 0:
-                            return current_solution
+            for score, solution in results:
+                if score == 0:
+                    return self._to_assignments(solution)
+                if score < self.best_score:
+                    self.best_score = score
+                    self.best_solution = solution
 
             # Check if any solution was found
             if self.best_score < float('inf'):
-                if self._validate_solution(self.best_solution):
-                    return self.best_solution
+                assignments = self._to_assignments(self.best_solution)
+                if self._validate_solution(assignments):
+                    return assignments
             return None
 
         except Exception as e:
@@ -289,36 +366,32 @@ class LocalSearchSolver(BaseSolver):
             if not solution or len(solution) != self.problem.number_of_exams:
                 return False
 
-            room_usage = defaultdict(int)
-            student_slots = defaultdict(list)
-
-            # Validate assignments and collect statistics
-            for exam in solution:
-                exam_id = exam['examId']
-                room = exam['room']
-                time = exam['timeSlot']
-
-                # Check bounds
-                if (room < 0 or room >= self.problem.number_of_rooms or
-                    time < 0 or time >= self.problem.number_of_slots):
-                    return False
-
-                # Check room capacity
-                students = self.problem.exams[exam_id].get_student_count()
-                room_usage[(room, time)] += students
-                if room_usage[(room, time)] > self.problem.rooms[room].capacity:
-                    return False
-
-                # Track student assignments
-                for student in self.problem.exams[exam_id].students:
-                    student_slots[student].append(time)
-
-            # Validate student conflicts
-            for slots in student_slots.values():
-                slots.sort()
-                for i in range(len(slots) - 1):
-                    if slots[i + 1] - slots[i] < 2:
-                        return False
+            exam_ids = np.fromiter((exam['examId'] for exam in solution), dtype=np.int64, count=len(solution))
+            rooms = np.fromiter((exam['room'] for exam in solution), dtype=np.int64, count=len(solution))
+            times = np.fromiter((exam['timeSlot'] for exam in solution), dtype=np.int64, count=len(solution))
+
+            # Check bounds
+            if (rooms.min() < 0 or rooms.max() >= self.problem.number_of_rooms or
+                    times.min() < 0 or times.max() >= self.problem.number_of_slots):
+                return False
+
+            # Check room capacity
+            room_load = np.zeros((self.problem.number_of_rooms, self.problem.number_of_slots), dtype=np.int64)
+            np.add.at(room_load, (rooms, times), self.exam_size[exam_ids])
+            if (room_load > self.room_capacity[:, None]).any():
+                return False
+
+            # Mark each student's slots, one per enrolment
+            busy = self._busy_scratch
+            busy.fill(0)
+            enrolments = np.diff(self.exam_students_indptr)[exam_ids]
+            students = np.concatenate([self.exam_students[self.exam_students_indptr[e]:self.exam_students_indptr[e + 1]]
+                                       for e in exam_ids])
+            np.add.at(busy, (students, np.repeat(times, enrolments)), 1)
+
+            # Validate student conflicts: two exams in one slot, or in adjacent slots
+            if (busy > 1).any() or (busy[:, 1:] & busy[:, :-1]).any():
+                return False
 
             return True
 
@@ -1,78 +1,103 @@
 from ortools.sat.python import cp_model
 from typing import Any
 
-from utilities import BaseSolver, SchedulingProblem
-from conditioning import IConstraint, SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, MorningSessionPreferenceConstraint, ExamGroupSizeOptimizationConstraint, \
-    BreakPeriodConstraint, InvigilatorBreakConstraint
+from utilities import BaseSolver, SchedulingProblem, LRUCache, greedy_assign, solver_threads
+from conditioning import build_constraints, RoomCapacityConstraint, NoConsecutiveSlotsConstraint
+
+
+# Built models keyed by (problem topology, room capacities, constraint classes), each stored with the
+# proto indices of its exam time and room variables
+_model_cache = LRUCache()
 
 
 class ORToolsSolver(BaseSolver):
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, hint=None):
         self.problem = problem
-        self.model = cp_model.CpModel()
-
-        # Create variables
-        self.exam_time = {}
-        self.exam_room = {}
-        for e in range(problem.number_of_exams):
-            self.exam_time[e] = self.model.NewIntVar(0, problem.number_of_slots - 1, f'exam_{e}_time')
-            self.exam_room[e] = self.model.NewIntVar(0, problem.number_of_rooms - 1, f'exam_{e}_room')
+        # Assignments to start the search from, e.g. a LocalSearchSolver result; a greedy timetable if None
+        self.hint = hint
 
         # Register only active constraints
-        self.constraints = []
-
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        if active_constraints is None:
-            # Use default core constraints if none specified
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        self.constraints = build_constraints(active_constraints)
+
+        # Start from a copy of the model already built for this problem and constraint set, if any
+        self.cache_key = (problem.topology_key(), tuple(room.capacity for room in problem.rooms),
+                          tuple(type(constraint).__name__ for constraint in self.constraints))
+        cached = _model_cache.get(self.cache_key)
+        self.model_built = cached is not None
+        if self.model_built:
+            cached_model, time_indices, room_indices = cached
+            self.model = cached_model.clone()
+            self.exam_time = {e: self.model.get_int_var_from_proto_index(i) for e, i in enumerate(time_indices)}
+            self.exam_room = {e: self.model.get_int_var_from_proto_index(i) for e, i in enumerate(room_indices)}
+        else:
+            self.model = cp_model.CpModel()
+
+            # Create variables; with room capacity enforced, each exam's room domain holds only rooms it fits in
+            restrict_rooms = any(isinstance(constraint, RoomCapacityConstraint) for constraint in self.constraints)
+            self.exam_time = {}
+            self.exam_room = {}
+            for e, exam in enumerate(problem.exams):
+                self.exam_time[e] = self.model.NewIntVar(0, problem.number_of_slots - 1, f'exam_{e}_time')
+                if restrict_rooms:
+                    feasible_rooms = [r for r, room in enumerate(problem.rooms)
+                                      if room.capacity >= exam.get_student_count()]
+                    self.exam_room[e] = self.model.NewIntVarFromDomain(
+                        cp_model.Domain.FromValues(feasible_rooms), f'exam_{e}_room')
+                else:
+                    self.exam_room[e] = self.model.NewIntVar(0, problem.number_of_rooms - 1, f'exam_{e}_room')
 
     @staticmethod
     def get_solver_name() -> str:
         return 'OR-Tools CP-SAT'
 
     def solve(self) -> list[dict[str, int | Any]] | None:
-        # Apply constraints
-        for constraint in self.constraints:
-            constraint.apply_ortools(self.model, self.problem, self.exam_time, self.exam_room)
+        if not self.model_built:
+            # Apply constraints
+            for constraint in self.constraints:
+                constraint.apply_ortools(self.model, self.problem, self.exam_time, self.exam_room)
+
+            # Redundant AllDifferent over each distinct set of exams a student sits, which propagates more
+            # strongly than the pairwise rows the no-consecutive-slots constraint posts for it
+            if any(isinstance(constraint, NoConsecutiveSlotsConstraint) for constraint in self.constraints):
+                student_exams = {}
+                for e, exam in enumerate(self.problem.exams):
+                    for student in exam.students:
+                        student_exams.setdefault(student, []).append(e)
+                for exams in {tuple(exams) for exams in student_exams.values() if len(exams) > 1}:
+                    self.model.AddAllDifferent([self.exam_time[e] for e in exams])
+
+            # Add objective to spread exams
+            max_time = self.model.NewIntVar(0, self.problem.number_of_slots - 1, 'max_time')
+            min_time = self.model.NewIntVar(0, self.problem.number_of_slots - 1, 'min_time')
+
+            # Link variables with max/min equalities, which propagate more tightly than one bound per exam
+            if self.problem.number_of_exams:
+                self.model.AddMaxEquality(max_time, list(self.exam_time.values()))
+                self.model.AddMinEquality(min_time, list(self.exam_time.values()))
 
-        # Add objective to spread exams
-        max_time = self.model.NewIntVar(0, self.problem.number_of_slots - 1, 'max_time')
-        min_time = self.model.NewIntVar(0, self.problem.number_of_slots - 1, 'min_time')
+            # Minimize the span
+            self.model.Minimize(max_time - min_time)
 
-        # Link variables
-        for e in range(self.problem.number_of_exams):
-            self.model.Add(max_time >= self.exam_time[e])
-            self.model.Add(min_time <= self.exam_time[e])
+            # Keep a copy of the finished model for later solvers of this problem
+            _model_cache.put(self.cache_key, (
+                self.model.clone(),
+                [self.exam_time[e].Index() for e in range(self.problem.number_of_exams)],
+                [self.exam_room[e].Index() for e in range(self.problem.number_of_exams)]
+            ))
+            self.model_built = True
 
-        # Minimize the span
-        self.model.Minimize(max_time - min_time)
+        # Hint CP-SAT with a known timetable, which its LNS workers repair into a first incumbent
+        hint = self.hint if self.hint is not None else greedy_assign(self.problem)
+        if hint is not None:
+            for assignment in hint:
+                self.model.AddHint(self.exam_room[assignment['examId']], assignment['room'])
+                self.model.AddHint(self.exam_time[assignment['examId']], assignment['timeSlot'])
 
         # Solve
         solver = cp_model.CpSolver()
+        solver.parameters.num_workers = solver_threads()
+        solver.parameters.repair_hint = True
+        solver.parameters.linearization_level = 2
         status = solver.Solve(self.model)
 
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
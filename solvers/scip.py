@@ -1,110 +1,143 @@
 from pyscipopt import Model, quicksum
 
+from collections import defaultdict
 from typing import Any, List, Dict
 
-from utilities import BaseSolver, SchedulingProblem
-from conditioning import IConstraint, SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, MorningSessionPreferenceConstraint, ExamGroupSizeOptimizationConstraint, \
-    BreakPeriodConstraint, InvigilatorBreakConstraint
+from utilities import BaseSolver, SchedulingProblem, LRUCache
+from conditioning import build_constraints
+
+
+# Built, unsolved models keyed by (problem topology, room capacities)
+_model_cache = LRUCache()
 
 
 class SCIPSolver(BaseSolver):
     def __init__(self, problem: SchedulingProblem, active_constraints=None):
         self.problem = problem
-        self.model = Model("SCIPScheduler")
+        self.cache_key = (problem.topology_key(), tuple(room.capacity for room in problem.rooms))
 
         # Register only active constraints
-        self.constraints = []
-
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        if active_constraints is None:
-            # Use default core constraints if none specified
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        self.constraints = build_constraints(active_constraints)
 
     @staticmethod
     def get_solver_name() -> str:
         return 'SCIP Solver'
 
-    def solve(self) -> List[Dict[str, int]] | None:
-        try:
-            # Create variables
-            assignments = {}
-            for e in range(self.problem.number_of_exams):
-                for r in range(self.problem.number_of_rooms):
-                    for t in range(self.problem.number_of_slots):
-                        assignments[(e, r, t)] = self.model.addVar(
-                            vtype="B",
-                            name=f"exam_{e}_room_{r}_time_{t}"
-                        )
-
-            # Single assignment constraint
-            for e in range(self.problem.number_of_exams):
-                self.model.addCons(
-                    quicksum(assignments[(e, r, t)]
-                             for r in range(self.problem.number_of_rooms)
-                             for t in range(self.problem.number_of_slots)) == 1
+    # Build the unsolved model for this problem: variables, assignment, capacity and student conflict rows
+    def _build_model(self, rooms_for, exam_size, room_capacity) -> Model:
+        number_of_exams = self.problem.number_of_exams
+        number_of_rooms = self.problem.number_of_rooms
+        number_of_slots = self.problem.number_of_slots
+        model = Model("SCIPScheduler")
+
+        # Inverted index: exams each student is enrolled in
+        student_to_exams = defaultdict(set)
+        for e, exam in enumerate(self.problem.exams):
+            for student in exam.students:
+                student_to_exams[student].add(e)
+
+        # Exam conflict graph: exams sharing at least one student
+        conflicts = defaultdict(set)
+        for exams in student_to_exams.values():
+            for e in exams:
+                conflicts[e] |= exams - {e}
+
+        # Cover the conflict graph with cliques, one same-slot row per clique per slot instead of per student:
+        # grow each distinct student exam set, largest first, by exams conflicting with all of it,
+        # and skip those already inside a kept clique
+        conflict_cliques = []
+        for exams in sorted({frozenset(exams) for exams in student_to_exams.values() if len(exams) > 1},
+                            key=len, reverse=True):
+            if any(exams <= clique for clique in conflict_cliques):
+                continue
+            clique = set(exams)
+            candidates = set.intersection(*(conflicts[e] for e in clique)) - clique
+            while candidates:
+                e = min(candidates)
+                clique.add(e)
+                candidates &= conflicts[e]
+            conflict_cliques.append(frozenset(clique))
+
+        # Create variables: one slot choice and one room choice per exam, O(E * (R + T)) instead of O(E * R * T)
+        exam_slot = {
+            (e, t): model.addVar(vtype="B", name=f"exam_{e}_time_{t}")
+            for e in range(number_of_exams) for t in range(number_of_slots)
+        }
+        exam_room = {
+            (e, r): model.addVar(vtype="B", name=f"exam_{e}_room_{r}")
+            for e in range(number_of_exams) for r in rooms_for[e]
+        }
+
+        # Single assignment constraint
+        for e in range(number_of_exams):
+            model.addCons(quicksum(exam_slot[(e, t)] for t in range(number_of_slots)) == 1)
+            model.addCons(quicksum(exam_room[(e, r)] for r in rooms_for[e]) == 1)
+
+        # Room capacity constraints, only for rooms whose fitting exams could together overfill them
+        for r in range(number_of_rooms):
+            room_exams = [e for e in range(number_of_exams) if r in rooms_for[e]]
+            if sum(exam_size[e] for e in room_exams) <= room_capacity[r]:
+                continue
+            for t in range(number_of_slots):
+                # in_cell is forced to 1 when exam e takes both room r and slot t
+                in_cell = {}
+                for e in room_exams:
+                    in_cell[e] = model.addVar(vtype="C", lb=0, ub=1, name=f"exam_{e}_room_{r}_time_{t}")
+                    model.addCons(in_cell[e] >= exam_slot[(e, t)] + exam_room[(e, r)] - 1)
+                model.addCons(
+                    quicksum(in_cell[e] * exam_size[e] for e in room_exams) <= room_capacity[r]
                 )
 
-            # Room capacity constraints
-            for r in range(self.problem.number_of_rooms):
-                for t in range(self.problem.number_of_slots):
-                    self.model.addCons(
-                        quicksum(assignments[(e, r, t)] * self.problem.exams[e].get_student_count()
-                                 for e in range(self.problem.number_of_exams))
-                        <= self.problem.rooms[r].capacity
-                    )
-
-            # Student conflict constraints
-            for student in range(self.problem.total_students):
-                student_exams = [e for e in range(self.problem.number_of_exams)
-                                 if student in self.problem.exams[e].students]
-
-                for t in range(self.problem.number_of_slots):
-                    self.model.addCons(
-                        quicksum(assignments[(e, r, t)]
-                                 for e in student_exams
-                                 for r in range(self.problem.number_of_rooms)) <= 1
-                    )
+        # Student conflict constraints: at most one exam of each conflict clique per slot
+        for clique in conflict_cliques:
+            for t in range(number_of_slots):
+                model.addCons(quicksum(exam_slot[(e, t)] for e in clique) <= 1)
+
+        model.setParam('display/verblevel', 0)
+        return model
+
+    def solve(self) -> List[Dict[str, int]] | None:
+        try:
+            number_of_exams = self.problem.number_of_exams
+            number_of_rooms = self.problem.number_of_rooms
+            number_of_slots = self.problem.number_of_slots
+            exam_size = [exam.get_student_count() for exam in self.problem.exams]
+            room_capacity = [room.capacity for room in self.problem.rooms]
+
+            # Rooms each exam fits in; an exam that fits none, or no slots at all, makes the instance infeasible
+            rooms_for = [[r for r in range(number_of_rooms) if room_capacity[r] >= exam_size[e]]
+                         for e in range(number_of_exams)]
+            if number_of_exams and (number_of_slots == 0 or not all(rooms_for)):
+                return None
+
+            # Start from a copy of the model already built for this problem, building and caching it otherwise
+            source_model = _model_cache.get(self.cache_key)
+            if source_model is None:
+                source_model = self._build_model(rooms_for, exam_size, room_capacity)
+                _model_cache.put(self.cache_key, source_model)
+            self.model = Model(sourceModel=source_model, origcopy=True)
+            variables = {var.name: var for var in self.model.getVars()}
+            exam_slot = {(e, t): variables[f"exam_{e}_time_{t}"]
+                         for e in range(number_of_exams) for t in range(number_of_slots)}
+            exam_room = {(e, r): variables[f"exam_{e}_room_{r}"]
+                         for e in range(number_of_exams) for r in rooms_for[e]}
 
             # Solve
-            self.model.setParam('display/verblevel', 0)
             self.model.optimize()
 
             if self.model.getStatus() == "optimal":
                 solution = []
-                for e in range(self.problem.number_of_exams):
-                    for r in range(self.problem.number_of_rooms):
-                        for t in range(self.problem.number_of_slots):
-                            if self.model.getVal(assignments[(e, r, t)]) > 0.5:
-                                solution.append({
-                                    'examId': e,
-                                    'room': r,
-                                    'timeSlot': t
-                                })
-                return solution if len(solution) == self.problem.number_of_exams else None
+                for e in range(number_of_exams):
+                    time_slot = next((t for t in range(number_of_slots)
+                                      if self.model.getVal(exam_slot[(e, t)]) > 0.5), None)
+                    room = next((r for r in rooms_for[e] if self.model.getVal(exam_room[(e, r)]) > 0.5), None)
+                    if time_slot is not None and room is not None:
+                        solution.append({
+                            'examId': e,
+                            'room': room,
+                            'timeSlot': time_slot
+                        })
+                return solution if len(solution) == number_of_exams else None
             return None
 
         except Exception as e:
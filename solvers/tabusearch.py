@@ -1,167 +1,273 @@
 from typing import List, Dict
-from collections import defaultdict
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 import random
+import threading
 import time
 
+import numpy as np
+from numba import get_num_threads
+
 from utilities import BaseSolver, SchedulingProblem
-from conditioning import IConstraint, SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, MorningSessionPreferenceConstraint, ExamGroupSizeOptimizationConstraint, \
-    BreakPeriodConstraint, InvigilatorBreakConstraint
+from utilities.kernels import timetable_penalty, timetable_move_deltas
+from conditioning import build_constraints
+
+
+# A candidate timetable as parallel arrays indexed by exam ID
+Solution = namedtuple('Solution', ['rooms', 'times'])
+
+# Solver owned by a chain worker process, built once by _init_chain
+_chain_solver = None
+
+
+def _init_chain(problem, active_constraints, elite, elite_lock, solved):
+    """Build the worker's solver once, attached to the elite pool and stop flag shared by all chains"""
+    global _chain_solver
+    _chain_solver = TabuSearchSolver(problem, active_constraints)
+    _chain_solver.elite, _chain_solver.elite_lock, _chain_solver.solved = elite, elite_lock, solved
+
+
+def _run_chain(seed, deadline):
+    """One tabu chain in a worker process, with its own random stream"""
+    _chain_solver.rng = random.Random(seed)
+    return _chain_solver._run_chain(deadline)
 
 
 class TabuSearchSolver(BaseSolver):
     """Tabu Search Solver Implementation"""
 
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, chains: int = 1, seed: int | None = None):
         self.problem = problem
-        self.tabu_list = []
-        self.tabu_tenure = 10
+        self.active_constraints = active_constraints
+        self.chains = chains  # Independent chains run in parallel processes; 1 runs a single chain in-process
+        self.rng = random.Random(seed)  # Solver-owned stream, so seeded runs are reproducible
+        self.seed_sequence = np.random.SeedSequence(seed)  # Source of independent per-chain seeds
+        self.elite = []  # Best (score, solution) pairs found by any chain, best first
+        self.elite_lock = threading.Lock()
+        self.elite_size = 5
+        self.solved = threading.Event()  # Set once any chain reaches a zero score
+        self.restart_after = 200  # Iterations without a new chain best before restarting near an elite solution
+        self.perturbation = 0.3  # Share of exams re-placed at random on a restart
+        self.tabu_list = deque()  # Placements recently moved out of, as (exam, room, time slot), oldest first
+        self.tabu_set = set()  # The same placements, for membership tests
+        self.tabu_tenure = 10  # Starting tenure; a chain lengthens it on each restart and shortens it on improvement
+        self.max_tabu_tenure = 50
         self.best_solution = None
         self.best_score = float('inf')
+
+        # Exam sizes and room capacities as flat arrays
+        self.exam_size = np.fromiter((exam.get_student_count() for exam in problem.exams),
+                                     dtype=np.int64, count=problem.number_of_exams)
+        self.room_capacity = np.fromiter((room.capacity for room in problem.rooms),
+                                         dtype=np.int64, count=problem.number_of_rooms)
+        # Exams in ID order, the order capacity overflow is accumulated in
+        self.exam_order = np.arange(problem.number_of_exams, dtype=np.int32)
+        # Each student's exams and each exam's students, as CSR arrays
+        self.student_indptr, self.student_exams = problem.student_exams_csr
+        self.exam_indptr, self.exam_students = problem.exam_students_csr
+        # Scratch buffers for the compiled evaluators
+        self.room_usage = np.empty((problem.number_of_rooms, problem.number_of_slots), dtype=np.int64)
+        self.student_slots = np.empty((get_num_threads(), max(np.diff(self.student_indptr).max(initial=0), 1)),
+                                      dtype=np.int32)
+        # Compile, or load from numba's cache, both evaluators now so the timed search is not billed for it
+        if problem.number_of_exams and problem.number_of_rooms and problem.number_of_slots:
+            placement = np.zeros(problem.number_of_exams, dtype=np.int32)
+            self._score_moves(Solution(placement, placement), 0, [(0, 0, 0)])
+            self._evaluate_solution(Solution(placement, placement))
+
         # Register only active constraints
-        self.constraints = []
-
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        if active_constraints is None:
-            # Use default core constraints if none specified
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        self.constraints = build_constraints(active_constraints)
 
     @staticmethod
     def get_solver_name() -> str:
         return 'Tabu Search Solver'
 
-    def _solution_hash(self, solution):
-        """Create a hash for a solution"""
-        return tuple(
-            (exam['examId'], exam['room'], exam['timeSlot'])
-            for exam in sorted(solution, key=lambda x: x['examId'])
-        )
+    def _to_assignments(self, solution):
+        """Convert a solution to the list of exam assignments returned by solve()"""
+        return [{'examId': e, 'room': int(solution.rooms[e]), 'timeSlot': int(solution.times[e])}
+                for e in range(self.problem.number_of_exams)]
 
     def _evaluate_solution(self, solution):
-        """Calculate penalty score for a solution"""
-        score = 0
-        room_usage = defaultdict(int)
-        student_slots = defaultdict(list)
-
-        for exam in solution:
-            e_id = exam['examId']
-            room = exam['room']
-            time = exam['timeSlot']
-
-            # Room capacity
-            capacity = self.problem.rooms[room].capacity
-            students = self.problem.exams[e_id].get_student_count()
-            if room_usage[(room, time)] + students > capacity:
-                score += (room_usage[(room, time)] + students - capacity) * 100
-            room_usage[(room, time)] += students
-
-            # Student assignments
-            for student in self.problem.exams[e_id].students:
-                student_slots[student].append(time)
-
-        # Student conflicts
-        for slots in student_slots.values():
-            slots.sort()
-            for i in range(len(slots) - 1):
-                if slots[i + 1] - slots[i] < 2:
-                    score += 1000
-
-        return score
-
-    def _get_neighbors(self, solution):
-        """Generate neighboring solutions"""
-        neighbors = []
-        for i in range(len(solution)):
-            # Room changes
-            for r in range(self.problem.number_of_rooms):
-                if r != solution[i]['room']:
-                    new_sol = [dict(exam) for exam in solution]
-                    new_sol[i] = {**new_sol[i], 'room': r}
-                    neighbors.append(new_sol)
-
-            # Time slot changes
-            for t in range(self.problem.number_of_slots):
-                if t != solution[i]['timeSlot']:
-                    new_sol = [dict(exam) for exam in solution]
-                    new_sol[i] = {**new_sol[i], 'timeSlot': t}
-                    neighbors.append(new_sol)
-
-        random.shuffle(neighbors)
-        return neighbors[:20]  # Limit number of neighbors for efficiency
+        """Calculate penalty score for a solution: 100 per student over a room's capacity, accumulated in exam ID
+        order, and 1000 per same or adjacent slot pair between consecutive exams of a student"""
+        return timetable_penalty(solution.rooms, solution.times, self.exam_order, self.exam_size, self.room_capacity,
+                                 self.student_indptr, self.student_exams, self.room_usage, 100, 1000)
 
-    def solve(self) -> List[Dict[str, int]] | None:
-        try:
-            start_time = time.time()
-            max_time = 30  # 30 seconds timeout
+    def _score_moves(self, solution, score, moves):
+        """Scores of the solution after each (exam, room, time slot) move, from the change in only the cells and
+        students it touches, computed for the whole batch in parallel"""
+        moves = np.asarray(moves, dtype=np.int64).reshape(-1, 3)
+        return score + timetable_move_deltas(solution.rooms, solution.times, moves,
+                                             self.exam_order, self.exam_size, self.room_capacity,
+                                             self.exam_indptr, self.exam_students,
+                                             self.student_indptr, self.student_exams, self.student_slots, 100, 1000)
 
-            # Initial solution
-            current_solution = []
-            for e in range(self.problem.number_of_exams):
-                current_solution.append({
-                    'examId': e,
-                    'room': random.randint(0, self.problem.number_of_rooms - 1),
-                    'timeSlot': random.randint(0, self.problem.number_of_slots - 1)
-                })
-
-            current_score = self._evaluate_solution(current_solution)
-            self.best_solution = current_solution
-            self.best_score = current_score
-
-            while time.time() - start_time < max_time:
-                neighbors = self._get_neighbors(current_solution)
-                best_neighbor = None
-                best_neighbor_score = float('inf')
-
-                for neighbor in neighbors:
-                    neighbor_hash = self._solution_hash(neighbor)
-                    if neighbor_hash not in self.tabu_list:
-                        score = self._evaluate_solution(neighbor)
-                        if score < best_neighbor_score:
-                            best_neighbor = neighbor
-                            best_neighbor_score = score
-
-                if best_neighbor is None:
-                    break
+    def _apply_move(self, solution, move):
+        """The solution with one exam moved; only the changed array is copied"""
+        exam_id, room, time_slot = move
+        rooms, times = solution.rooms, solution.times
+        if room != rooms[exam_id]:
+            rooms = rooms.copy()
+            rooms[exam_id] = room
+        if time_slot != times[exam_id]:
+            times = times.copy()
+            times[exam_id] = time_slot
+        return Solution(rooms, times)
+
+    def _get_neighbors(self, solution, limit=20):
+        """Sample up to limit distinct neighboring moves, as rows of (exam, room, time slot), straight from their
+        indices: exam e's room changes come first, numbered e * (rooms - 1) + j, then its time slot changes"""
+        number_of_exams = self.problem.number_of_exams
+        room_moves = number_of_exams * (self.problem.number_of_rooms - 1)
+        total = room_moves + number_of_exams * (self.problem.number_of_slots - 1)
+        index = np.array(self.rng.sample(range(total), min(limit, total)), dtype=np.int64)
+        moves = np.empty((len(index), 3), dtype=np.int64)
+
+        # Room changes: the j-th other room of exam e, skipping its current room
+        is_room = index < room_moves
+        exams, j = np.divmod(index[is_room], max(self.problem.number_of_rooms - 1, 1))
+        moves[is_room, 0] = exams
+        moves[is_room, 1] = j + (j >= solution.rooms[exams])
+        moves[is_room, 2] = solution.times[exams]
 
+        # Time slot changes: the j-th other slot of exam e, skipping its current slot
+        exams, j = np.divmod(index[~is_room] - room_moves, max(self.problem.number_of_slots - 1, 1))
+        moves[~is_room, 0] = exams
+        moves[~is_room, 1] = solution.rooms[exams]
+        moves[~is_room, 2] = j + (j >= solution.times[exams])
+
+        return moves
+
+    def _offer_elite(self, score, solution):
+        """Add a solution to the shared elite pool, keeping only the elite_size best"""
+        with self.elite_lock:
+            elite = list(self.elite)
+            elite.append((score, solution))
+            elite.sort(key=lambda entry: entry[0])
+            self.elite[:] = elite[:self.elite_size]
+
+    def _perturb(self, solution, frac):
+        """A copy of the solution with a random frac of its exams moved to random rooms and time slots"""
+        rooms, times = solution.rooms.copy(), solution.times.copy()
+        count = max(1, round(frac * self.problem.number_of_exams))
+        for e in self.rng.sample(range(self.problem.number_of_exams), min(count, self.problem.number_of_exams)):
+            rooms[e] = self.rng.randint(0, self.problem.number_of_rooms - 1)
+            times[e] = self.rng.randint(0, self.problem.number_of_slots - 1)
+        return Solution(rooms, times)
+
+    def _run_chain(self, deadline):
+        """One tabu chain from a random start, restarting near a random elite solution whenever it stagnates;
+        returns its best (score, solution), stopping early at a zero score from any chain"""
+        # Initial solution
+        rooms = np.empty(self.problem.number_of_exams, dtype=np.int32)
+        times = np.empty(self.problem.number_of_exams, dtype=np.int32)
+        for e in range(self.problem.number_of_exams):
+            rooms[e] = self.rng.randint(0, self.problem.number_of_rooms - 1)
+            times[e] = self.rng.randint(0, self.problem.number_of_slots - 1)
+        current_solution = Solution(rooms, times)
+
+        current_score = self._evaluate_solution(current_solution)
+        best_solution, best_score = current_solution, current_score
+        self.tabu_list.clear()
+        self.tabu_set.clear()
+        tenure = self.tabu_tenure
+        stagnation = 0
+
+        while time.time() < deadline and best_score > 0 and not self.solved.is_set():
+            neighbors = self._get_neighbors(current_solution)
+            # No moves at all: nothing left to search
+            if not len(neighbors):
+                break
+            best_neighbor = None
+            best_neighbor_score = float('inf')
+
+            # Score the moves in one batch by their change from the current solution and keep the first best
+            # allowed one: a move back into a tabu placement is allowed only if it beats the chain's best score
+            scores = self._score_moves(current_solution, current_score, neighbors)
+            allowed = np.fromiter((move not in self.tabu_set for move in map(tuple, neighbors.tolist())), dtype=bool,
+                                  count=len(neighbors)) | (scores < best_score)
+            if allowed.any():
+                best = int(np.argmin(np.where(allowed, scores, np.iinfo(np.int64).max)))
+                best_move = tuple(neighbors[best].tolist())
+                best_neighbor = self._apply_move(current_solution, best_move)
+                best_neighbor_score = int(scores[best])
+
+            # Every sampled move is tabu: diversify now rather than stopping the chain
+            if best_neighbor is None:
+                stagnation = self.restart_after
+            else:
+                exam_id = best_move[0]
+                left = (exam_id, int(current_solution.rooms[exam_id]), int(current_solution.times[exam_id]))
                 current_solution = best_neighbor
                 current_score = best_neighbor_score
 
-                if current_score < self.best_score:
-                    self.best_solution = current_solution
-                    self.best_score = current_score
+                if current_score < best_score:
+                    best_solution, best_score = current_solution, current_score
+                    self._offer_elite(best_score, best_solution)
+                    tenure = max(self.tabu_tenure, tenure - 1)
+                    stagnation = 0
+                else:
+                    stagnation += 1
+
+                # Update tabu list: moving the exam back to the placement it left is tabu for the current tenure
+                self.tabu_list.append(left)
+                self.tabu_set.add(left)
+                while len(self.tabu_list) > tenure:
+                    expired = self.tabu_list.popleft()
+                    if expired not in self.tabu_list:
+                        self.tabu_set.discard(expired)
+
+            # Stagnating: diversify from a perturbed copy of one of the best solutions any chain has found,
+            # with fresh and longer tabu memory
+            if stagnation >= self.restart_after:
+                elite = list(self.elite) or [(best_score, best_solution)]
+                current_solution = self._perturb(elite[self.rng.randrange(len(elite))][1], self.perturbation)
+                current_score = self._evaluate_solution(current_solution)
+                self.tabu_list.clear()
+                self.tabu_set.clear()
+                tenure = min(self.max_tabu_tenure, tenure + 5)
+                stagnation = 0
+
+        if best_score == 0:
+            self.solved.set()
+        return best_score, best_solution
+
+    def _run_chains(self, deadline):
+        """Run the chains across worker processes sharing one elite pool, yielding each (score, solution)
+        as it completes"""
+        # Workers are spawned rather than forked, since forking after Numba's thread pool has started is unsafe
+        context = multiprocessing.get_context('spawn')
+        seeds = [int(child.generate_state(1)[0]) for child in self.seed_sequence.spawn(self.chains)]
+        with context.Manager() as manager:
+            executor = ProcessPoolExecutor(max_workers=self.chains, mp_context=context, initializer=_init_chain,
+                                           initargs=(self.problem, self.active_constraints, manager.list(),
+                                                     manager.Lock(), manager.Event()))
+            try:
+                futures = [executor.submit(_run_chain, seed, deadline) for seed in seeds]
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def solve(self) -> List[Dict[str, int]] | None:
+        try:
+            max_time = 30  # 30 seconds timeout
+            deadline = time.time() + max_time
 
-                # Update tabu list
-                self.tabu_list.append(self._solution_hash(current_solution))
-                if len(self.tabu_list) > self.tabu_tenure:
-                    self.tabu_list.pop(0)
+            if self.chains > 1:
+                results = self._run_chains(deadline)
+            else:
+                results = [self._run_chain(deadline)]
 
-                if self.best_score == 0:
+            for score, solution in results:
+                if score < self.best_score:
+                    self.best_score = score
+                    self.best_solution = solution
+                if score == 0:
                     break
 
-            return self.best_solution if self.best_score == 0 else None
+            return self._to_assignments(self.best_solution) if self.best_score == 0 else None
 
         except Exception as e:
             print(f"Tabu Search Solver error: {str(e)}")
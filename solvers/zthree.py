@@ -1,76 +1,88 @@
-from z3 import Solver, Int, unsat
+from z3 import Solver, IntVector, And, Then, With, unsat
 from typing import Any
 
 from utilities import SchedulingProblem
-from conditioning import IConstraint, SingleAssignmentConstraint, RoomConflictConstraint, RoomCapacityConstraint, \
-    NoConsecutiveSlotsConstraint, MaxExamsPerSlotConstraint, DepartmentGroupingConstraint, RoomBalancingConstraint, \
-    InvigilatorAssignmentConstraint, MorningSessionPreferenceConstraint, ExamGroupSizeOptimizationConstraint, \
-    BreakPeriodConstraint, InvigilatorBreakConstraint
+from conditioning import build_constraints
+
+
+# SMT core settings for these linear integer timetabling formulas: fixed heuristics instead of auto_config's
+# guess, no relevancy filtering, no equality propagation between arithmetic terms, and a fixed seed
+SMT_PARAMS = {'auto_config': False, 'relevancy': 0, 'arith.propagate_eqs': False, 'random_seed': 1}
+
+
+def build_solver() -> Solver:
+    """Build a plain Z3 solver configured with SMT_PARAMS"""
+    solver = Solver()
+    solver.set(**SMT_PARAMS)
+    return solver
+
+
+def build_tactic_solver() -> Solver:
+    """Build a Z3 solver driven by a fixed simplify/propagate/solve-eqs/smt tactic pipeline"""
+    return Then('simplify', 'propagate-values', 'solve-eqs', With('smt', **SMT_PARAMS)).solver()
 
 
 class ZThreeSolver:
-    def __init__(self, problem: SchedulingProblem, active_constraints=None):
+    def __init__(self, problem: SchedulingProblem, active_constraints=None, solver: Solver = None):
         self.problem = problem
-        self.solver = Solver()
+        # Reuse a caller-owned solver when given so Z3 keeps its setup warm across instances
+        self.owns_solver = solver is None
+        self.solver = solver if solver is not None else build_solver()
 
-        self.exam_time = [Int(f'exam_{e}_time') for e in range(problem.number_of_exams)]
-        self.exam_room = [Int(f'exam_{e}_room') for e in range(problem.number_of_rooms)]
+        self.exam_time = IntVector('exam_time', problem.number_of_exams)
+        self.exam_room = IntVector('exam_room', problem.number_of_exams)
 
         # Register only active constraints
-        self.constraints = []
-
-        constraint_map = {
-            'single_assignment': SingleAssignmentConstraint,
-            'room_conflicts': RoomConflictConstraint,
-            'room_capacity': RoomCapacityConstraint,
-            'student_spacing': NoConsecutiveSlotsConstraint,
-            'max_exams_per_slot': MaxExamsPerSlotConstraint,
-            'morning_sessions': MorningSessionPreferenceConstraint,
-            'exam_group_size': ExamGroupSizeOptimizationConstraint,
-            'department_grouping': DepartmentGroupingConstraint,
-            'room_balancing': RoomBalancingConstraint,
-            'invigilator_assignment': InvigilatorAssignmentConstraint,
-            'break_period': BreakPeriodConstraint,
-            'invigilator_break': InvigilatorBreakConstraint
-        }
-
-        if active_constraints is None:
-            # Use default core constraints if none specified
-            active_constraints = [
-                'single_assignment', 'room_conflicts',
-                'room_capacity', 'student_spacing',
-                'max_exams_per_slot'
-            ]
-
-        for constraint_name in active_constraints:
-            if constraint_name in constraint_map:
-                self.constraints.append(constraint_map[constraint_name]())
+        self.constraints = build_constraints(active_constraints)
+        # Whether this instance's constraints are asserted in an open scope of the solver
+        self.base_scope_open = False
 
     @staticmethod
     def get_solver_name() -> str:
         """Get the name of the solver"""
         return 'Z3 Solver'
 
-    def solve(self) -> list[dict[str, int | Any]] | None:
-        """Apply constraints and solve the scheduling problem"""
+    def solve(self, extra_constraints=None) -> list[dict[str, int | Any]] | None:
+        """Apply constraints and solve the scheduling problem, with extra_constraints (names) for this call only"""
+
+        # Base scope: this instance's constraints, asserted once and kept for later calls while the solver is ours
+        if not self.base_scope_open:
+            self.solver.push()
+            # Bound every variable to its slot and room range whatever the active constraints, so Z3 searches
+            # finite domains rather than all integers
+            self.solver.add([And(0 <= t, t < self.problem.number_of_slots) for t in self.exam_time])
+            self.solver.add([And(0 <= r, r < self.problem.number_of_rooms) for r in self.exam_room])
+            for constraint in self.constraints:
+                constraint.apply_z3(self.solver, self.problem, self.exam_time, self.exam_room)
+            self.base_scope_open = True
 
-        # Apply all constraints
-        for constraint in self.constraints:
-            constraint.apply_z3(self.solver, self.problem, self.exam_time, self.exam_room)
+        # Call scope: constraints varied per call, retracted afterwards
+        self.solver.push()
+        try:
+            base_types = {type(constraint) for constraint in self.constraints}
+            for constraint in build_constraints(extra_constraints) if extra_constraints else []:
+                if type(constraint) not in base_types:
+                    constraint.apply_z3(self.solver, self.problem, self.exam_time, self.exam_room)
 
-        # Check satisfiability
-        if self.solver.check() == unsat:
-            return None
+            # Check satisfiability
+            if self.solver.check() == unsat:
+                return None
 
-        # Get solution
-        model = self.solver.model()
-        solution = []
+            # Get solution
+            model = self.solver.model()
+            solution = []
 
-        for exam in range(self.problem.number_of_exams):
-            solution.append({
-                'examId': exam,
-                'room': model[self.exam_room[exam]].as_long(),
-                'timeSlot': model[self.exam_time[exam]].as_long()
-            })
+            for exam in range(self.problem.number_of_exams):
+                solution.append({
+                    'examId': exam,
+                    'room': model[self.exam_room[exam]].as_long(),
+                    'timeSlot': model[self.exam_time[exam]].as_long()
+                })
 
-        return solution
+            return solution
+        finally:
+            self.solver.pop()
+            # Leave a caller-owned solver as it was handed over
+            if not self.owns_solver:
+                self.solver.pop()
+                self.base_scope_open = False
@@ -2,8 +2,16 @@
 import traceback
 # Import regular expressions library
 import re
+# Import os for fast directory scanning
+import os
 # Import specialized collection types
 from collections import defaultdict, Counter
+# Import process pool for solving independent instances in parallel, and thread pool for reading them
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+# Import the error raised by futures of a pool whose worker died
+from concurrent.futures.process import BrokenProcessPool
+# Import multiprocessing for the spawn start method of the solver pool
+import multiprocessing
 # Import path handling utilities
 from pathlib import Path
 # Import time module with alias
@@ -11,19 +19,65 @@ import time as time_module
 # Import typing hints
 from typing import List
 
+# Import numba to keep each pool worker's compiled kernels on one thread
+from numba import set_num_threads
+
 # Import constraint definitions for scheduling
-from conditioning import RoomCapacityConstraint, NoConsecutiveSlotsConstraint, \
-    RoomBalancingConstraint, DepartmentGroupingConstraint, InvigilatorAssignmentConstraint, \
-    SingleAssignmentConstraint, RoomConflictConstraint, MorningSessionPreferenceConstraint, BreakPeriodConstraint, \
-    ExamGroupSizeOptimizationConstraint, InvigilatorBreakConstraint, MaxExamsPerSlotConstraint
+from conditioning import CONSTRAINT_REGISTRY
 # Import solver factory for creating solver instances
 from factories.solver_factory import SolverFactory
+# Import Z3 tactic solver builder so each worker configures Z3 once
+from solvers import build_tactic_solver
 # Import file reading utilities
 from filesystem import ProblemFileReader
 # Import GUI components
 from gui import timetablinggui
 # Import utility functions
-from utilities.functions import format_elapsed_time
+from utilities.functions import format_elapsed_time, set_solver_threads
+
+
+# Minimum number of seconds between progress redraws while instances are being solved
+UI_UPDATE_INTERVAL = 0.1
+# Number of threads reading test files ahead of the solvers
+FILE_READER_THREADS = 4
+
+# Number embedded in a test file name, used to sort instances naturally
+_NUM_RE = re.compile(r'\d+')
+
+# Z3 solver owned by the current worker process, reused across the instances it handles
+_worker_z3_solver = None
+
+
+# Set up per-process state when a pool worker starts
+def _init_worker():
+    global _worker_z3_solver
+    # One worker per core already fills the machine, so each solver runs single-threaded and its time
+    # is not measured under oversubscription
+    set_solver_threads(1)
+    set_num_threads(1)
+    _worker_z3_solver = build_tactic_solver()
+
+
+# Extra construction options for solvers that can reuse worker-owned state
+def _solver_options(solver_name):
+    # Hand the worker's Z3 solver to Z3 so it is not rebuilt for every file
+    if solver_name == 'z3' and _worker_z3_solver is not None:
+        return {'solver': _worker_z3_solver}
+    return {}
+
+
+# Solve one problem inside a pool worker
+def _solve_instance(problem, solver_names, active_constraints):
+    """Run each named solver on a problem, returning their solutions and times."""
+    runs = []
+    for solver_name in solver_names:
+        start_time = time_module.time()
+        solver_instance = SolverFactory.get_solver(solver_name, problem, active_constraints,
+                                                   **_solver_options(solver_name))
+        solution = solver_instance.solve()
+        runs.append((solution, int((time_module.time() - start_time) * 1000)))
+
+    return runs
 
 
 # Main controller class for scheduling operations
@@ -31,6 +85,30 @@ class SchedulerController:
     # Initialize controller with view reference
     def __init__(self, view):
         self.view = view
+        # Worker pool kept alive across runs so each worker's configured Z3 solver is reused
+        self.executor = None
+        # Whether a run is in progress; further Run clicks are ignored until it finishes
+        self.running = False
+
+    # Worker pool for solving, started on first use and again after a worker crash broke it
+    def _get_executor(self):
+        if self.executor is None:
+            # Spawn rather than fork: by now this process runs reader threads and Numba's thread pool
+            self.executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=_init_worker)
+        return self.executor
+
+    # Drop a broken worker pool so the next submission starts a fresh one
+    def _discard_executor(self, executor):
+        executor.shutdown(wait=False, cancel_futures=True)
+        if self.executor is executor:
+            self.executor = None
+
+    # Stop the worker pool, called when the window closes
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
 
     # Handle folder selection for test instances
     def select_folder(self):
@@ -44,6 +122,10 @@ class SchedulerController:
 
 # Execute the scheduler with selected settings
     def run_scheduler(self):
+        # Ignore the click while a previous run is still reading or solving
+        if self.running:
+            return
+
         # Check if test directory is selected
         if not self.view.tests_dir:
             self.view.status_label.configure(text="Please select a test instances folder first.")
@@ -70,7 +152,9 @@ class SchedulerController:
         # Update UI
         self.view.update_idletasks()
 
-        # Process test files with selected solvers
+        # Process test files with selected solvers, with the Run button disabled until results are collected
+        self.running = True
+        self.view.run_button.configure(state="disabled")
         self._process_files(solver1, solver2, active_constraints)
 
     # Validate solver selections
@@ -95,90 +179,127 @@ class SchedulerController:
 
     # Process all test files
     def _process_files(self, solver1, solver2, active_constraints):
+        # Get sorted list of test files, scanning names without a stat call per entry
+        keyed_files = []
+        with os.scandir(self.view.tests_dir) as entries:
+            for entry in entries:
+                number = _NUM_RE.search(entry.name)
+                if entry.name.startswith(('sat', 'unsat')) and number:
+                    keyed_files.append((int(number.group()), entry.name, entry.path))
+        keyed_files.sort()
+        test_files = [Path(path) for _, _, path in keyed_files]
+
+        # Read files on a small thread pool so disk reads overlap with solving
+        reader = ThreadPoolExecutor(max_workers=FILE_READER_THREADS)
+        reading = {
+            reader.submit(ProblemFileReader.read_file, str(test_file)): (i, test_file)
+            for i, test_file in enumerate(test_files)
+        }
+        reader.shutdown(wait=False)
+
+        # Solve instances in parallel as soon as they are read; they are independent of each other
+        solver_names = [solver1, solver2] if solver2 else [solver1]
+        solving = {}
+
+        # Collected outcomes keyed by file position so results keep their sorted order
+        outcomes = {}
+        total_files = len(test_files)
+        self.view.status_label.configure(text=f"Processing {total_files} instances...")
+        # Time of the last progress redraw, used to throttle updates to one per UI_UPDATE_INTERVAL
+        last_ui_update = time_module.monotonic()
+
+        # Drain finished futures from the Tk event loop so the window stays responsive
+        def poll():
+            nonlocal last_ui_update
+            done, _ = wait(list(reading) + list(solving), timeout=0, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in reading:
+                    # Hand a freshly read problem to the solver pool
+                    i, test_file = reading.pop(future)
+                    try:
+                        problem = future.result()
+                        executor = self._get_executor()
+                        solving[executor.submit(_solve_instance, problem, solver_names,
+                                                active_constraints)] = (i, test_file, problem, executor)
+                    except Exception as e:
+                        print(f"Error processing {test_file.name}: {str(e)}")
+                    continue
+
+                i, test_file, problem, executor = solving.pop(future)
+                try:
+                    outcomes[i] = (test_file, problem, future.result())
+                except BrokenProcessPool as e:
+                    # A worker died: later files go to a fresh pool
+                    self._discard_executor(executor)
+                    print(f"Error processing {test_file.name}: {str(e)}")
+                except Exception as e:
+                    print(f"Error processing {test_file.name}: {str(e)}")
+
+            # Update status display at most once per interval, and always for the last file
+            pending = len(reading) + len(solving)
+            now = time_module.monotonic()
+            if done and (now - last_ui_update > UI_UPDATE_INTERVAL or not pending):
+                last_ui_update = now
+                completed = total_files - pending
+                self.view.status_label.configure(text=f"Processed {completed}/{total_files} instances")
+                self.view.progressbar.set(completed / total_files)
+                self.view.update_idletasks()
+
+            if pending:
+                self.view.after(50, poll)
+                return
+
+            self._collect_results(solver1, solver2, [outcomes[i] for i in sorted(outcomes)])
+
+        poll()
+
+    # Build result tables once every instance has been solved
+    def _collect_results(self, solver1, solver2, outcomes):
+        # The run is over: accept the next Run click
+        self.running = False
+        self.view.run_button.configure(state="normal")
+
         # Initialize results collections
         comparison_results = []
         unsat_results = []
         total_solution_time = 0
 
-        # Get sorted list of test files
-        test_files = sorted(
-            [f for f in self.view.tests_dir.iterdir()
-             if (f.name.startswith('sat') or f.name.startswith('unsat')) and f.name != ".idea"],
-            key=lambda x: int(re.search(r'\d+', x.stem).group() or 0)
-        )
-
-        # Process each test file
-        total_files = len(test_files)
-        for i, test_file in enumerate(test_files):
-            try:
-                # Process individual file
-                self._process_single_file(
-                    test_file, solver1, solver2,
-                    comparison_results, unsat_results, total_solution_time,
-                    i, total_files, active_constraints
-                )
-            except Exception as e:
-                print(f"Error processing {test_file.name}: {str(e)}")
-                continue
+        for test_file, problem, runs in outcomes:
+            self.view.current_problem = problem
+            total_solution_time += sum(time for _, time in runs)
+            self._record_result(test_file, problem, solver1, solver2, runs, comparison_results, unsat_results)
 
         # Display final results
         self._display_results(solver1, solver2, comparison_results, unsat_results, total_solution_time)
 
-    # Process a single test file
-    def _process_single_file(self, test_file, solver1, solver2, comparison_results, unsat_results,
-                             total_solution_time, current_index, total_files, active_constraints):
-        """Process a single test file and update the results."""
-        # Update status display
-        self.view.status_label.configure(text=f"Processing {test_file.name}...")
-        self.view.progressbar.set((current_index + 1) / total_files)
-        self.view.update()
-
-        # Read problem file
-        problem = ProblemFileReader.read_file(str(test_file))
-        self.view.current_problem = problem
-
-        # Process first solver
-        start_time1 = time_module.time()
-        solver1_instance = SolverFactory.get_solver(solver1, problem, active_constraints)
-        solution1 = solver1_instance.solve()
-        time1 = int((time_module.time() - start_time1) * 1000)
-        total_solution_time += time1
+    # Store the outcome of a single test file
+    def _record_result(self, test_file, problem, solver1, solver2, runs, comparison_results, unsat_results):
+        """Add a solved test file to the results, keeping solutions as structured assignments."""
+        solution1, time1 = runs[0]
 
         # Single solver mode processing
         if not self.view.comparison_mode_var.get():
             if solution1:
-                # Format and store satisfiable solution
-                formatted_solution = self.view.format_solution(solution1)
+                # Store satisfiable solution; text formatting is left to views that need it
                 comparison_results.append({
                     'instance_name': test_file.stem,
                     'solution': solution1,
                     'problem': problem,
-                    'formatted_solution': formatted_solution,
                     'time': time1
                 })
             else:
                 # Store unsatisfiable result
                 unsat_results.append({
-                    'instance_name': test_file.stem,
-                    'formatted_solution': "N/A"
+                    'instance_name': test_file.stem
                 })
         else:
             # Comparison mode processing
-            start_time2 = time_module.time()
-            solver2_instance = SolverFactory.get_solver(solver2, problem, active_constraints)
-            solution2 = solver2_instance.solve()
-            time2 = int((time_module.time() - start_time2) * 1000)
-            total_solution_time += time2
-
-            # Format solutions
-            formatted_solution1 = self.view.format_solution(solution1) if solution1 else "N/A"
-            formatted_solution2 = self.view.format_solution(solution2) if solution2 else "N/A"
+            solution2, time2 = runs[1]
 
             # Store results based on satisfiability
             if solution1 is None and solution2 is None:
                 unsat_results.append({
-                    'instance_name': test_file.stem,
-                    'formatted_solution': "N/A"
+                    'instance_name': test_file.stem
                 })
             else:
                 comparison_results.append({
@@ -186,13 +307,11 @@ class SchedulerController:
                     'solver1': {
                         'name': solver1,
                         'solution': solution1,
-                        'formatted_solution': formatted_solution1,
                         'time': time1
                     },
                     'solver2': {
                         'name': solver2,
                         'solution': solution2,
-                        'formatted_solution': formatted_solution2,
                         'time': time2
                     },
                     'problem': problem,
@@ -227,15 +346,14 @@ class SchedulerController:
                 active_constraints
             ))
         else:
-            # Single solver mode: format results for table creation
+            # Single solver mode: collect results for table creation
             formatted_results = []
             for result in comparison_results:
                 if isinstance(result.get('solution'), list):
                     formatted_results.append({
                         'instance_name': result['instance_name'],
                         'solution': result['solution'],
-                        'problem': result['problem'],
-                        'formatted_solution': result['formatted_solution']
+                        'problem': result['problem']
                     })
 
             # Create result tables
@@ -387,27 +505,11 @@ class ComparisonController:
             return None
 
         try:
-            # Define mapping of constraint names to constraint classes
-            constraint_classes = {
-                'single_assignment': SingleAssignmentConstraint,
-                'room_conflicts': RoomConflictConstraint,
-                'room_capacity': RoomCapacityConstraint,
-                'student_spacing': NoConsecutiveSlotsConstraint,
-                'max_exams_per_slot': MaxExamsPerSlotConstraint,
-                'morning_sessions': MorningSessionPreferenceConstraint,
-                'exam_group_size': ExamGroupSizeOptimizationConstraint,
-                'department_grouping': DepartmentGroupingConstraint,
-                'room_balancing': RoomBalancingConstraint,
-                'invigilator_assignment': InvigilatorAssignmentConstraint,
-                'break_period': BreakPeriodConstraint,
-                'invigilator_break': InvigilatorBreakConstraint
-            }
-
             # Calculate metrics for active constraints
             metrics = {}
             for constraint_name in active_constraints:
-                if constraint_name in constraint_classes:
-                    constraint = constraint_classes[constraint_name]()
+                if constraint_name in CONSTRAINT_REGISTRY:
+                    constraint = CONSTRAINT_REGISTRY[constraint_name]()
                     metrics[constraint_name] = self._evaluate_constraint(constraint, problem, solution)
 
             # Normalize metrics and set minimum value
@@ -1,6 +1,9 @@
 # Import List type hint
 from typing import List
 
+# Import themed Tk widgets for result tables
+from tkinter import ttk
+
 # Import solver factory and GUI components
 from factories.solver_factory import SolverFactory
 from gui import timetablinggui
@@ -117,6 +120,9 @@ class SchedulerView(timetablinggui.TimetablingGUI):
             )
             # Position button in grid
             button.grid(row=i, column=0, padx=20, pady=10)
+            # Keep the Run button so the controller can disable it during a run
+            if command == self.scheduler_controller.run_scheduler:
+                self.run_button = button
 
     # Create solver selection dropdown in sidebar
     def _create_solver_selection(self):
@@ -213,6 +219,13 @@ class SchedulerView(timetablinggui.TimetablingGUI):
         for scroll in [self.all_scroll, self.sat_scroll, self.unsat_scroll]:
             scroll.pack(fill="both", expand=True)
 
+        # Style result tables to match the dark theme
+        style = ttk.Style(self)
+        style.theme_use("default")
+        style.configure("Results.Treeview", background="gray20", fieldbackground="gray20",
+                        foreground="white", rowheight=25, borderwidth=0)
+        style.configure("Results.Treeview.Heading", background="gray30", foreground="white", relief="flat")
+
     # Create progress bar and status label
     def _create_progress_indicators(self):
         # Create progress bar
@@ -292,56 +305,40 @@ class SchedulerView(timetablinggui.TimetablingGUI):
         table_container = timetablinggui.GUIFrame(instance_frame)
         table_container.pack(fill="both", expand=True)
 
-        # Create canvas for horizontal scrolling
-        canvas = timetablinggui.GUICanvas(table_container)
-        scrollbar = timetablinggui.GUIScrollbar(table_container, orientation="horizontal", command=canvas.xview)
-
-        # Create frame inside canvas
-        inner_frame = timetablinggui.GUIFrame(canvas)
-
-        # Configure scrolling
-        canvas.configure(xscrollcommand=scrollbar.set)
-        canvas.create_window((0, 0), window=inner_frame, anchor="nw")
-
-        # Pack canvas and scrollbar
-        canvas.pack(side="top", fill="both", expand=True)
-        scrollbar.pack(side="bottom", fill="x")
-
         # Create table if data exists
         if data:
             # Use provided headers or default headers
             table_headers = headers if headers is not None else self.sat_headers
-            values = [table_headers] + data
-
-            # Create table
-            table = timetablinggui.TableManager(
-                master=inner_frame,
-                row=len(values),
-                column=len(table_headers),
-                values=values,
-                header_color=("gray70", "gray30"),
-                hover=False
-            )
-            table.pack(fill="both", expand=True)
-
-            # Update canvas scroll region
-            inner_frame.update_idletasks()
-            table_width = inner_frame.winfo_reqwidth()
-            table_height = inner_frame.winfo_reqheight()
-
-            # Configure canvas dimensions
-            canvas.configure(
-                scrollregion=(0, 0, table_width, table_height),
-                width=min(table_width, 1100),  # Limit initial view width
-                height=table_height
+            columns = tuple(range(len(table_headers)))
+
+            # Create table as a single native Treeview rather than one widget per cell
+            table = ttk.Treeview(
+                table_container,
+                columns=columns,
+                show="headings",
+                height=len(data),
+                style="Results.Treeview"
             )
+            for column, header in zip(columns, table_headers):
+                table.heading(column, text=header)
+                table.column(column, anchor="center", minwidth=100, width=140)
+            for row in data:
+                table.insert("", "end", values=row)
+
+            # Create scrollbar for horizontal scrolling
+            scrollbar = timetablinggui.GUIScrollbar(table_container, orientation="horizontal", command=table.xview)
+            table.configure(xscrollcommand=scrollbar.set)
+
+            # Pack table and scrollbar
+            table.pack(side="top", fill="both", expand=True)
+            scrollbar.pack(side="bottom", fill="x")
 
             # Configure horizontal scrolling with mousewheel
             def _on_mousewheel(event):
                 if event.state & 4:  # Check if shift is held down
-                    canvas.xview_scroll(-int(event.delta / 120), "units")
+                    table.xview_scroll(-int(event.delta / 120), "units")
 
-            canvas.bind_all("<MouseWheel>", _on_mousewheel)
+            table.bind("<MouseWheel>", _on_mousewheel)
 
         return instance_frame
 
@@ -445,6 +442,8 @@ class SchedulerView(timetablinggui.TimetablingGUI):
         for scroll in [self.all_scroll, self.sat_scroll, self.unsat_scroll]:
             for widget in scroll.winfo_children():
                 widget.destroy()
+            # Unmap while building so geometry is computed once at the end rather than per table
+            scroll.pack_forget()
 
         # Get list of currently active constraints
         active_constraints = [
@@ -548,6 +547,11 @@ class SchedulerView(timetablinggui.TimetablingGUI):
                     is_sat_tab=False
                 )
 
+        # Map the finished tables back and lay them all out in a single pass
+        for scroll in [self.all_scroll, self.sat_scroll, self.unsat_scroll]:
+            scroll.pack(fill="both", expand=True)
+        self.update_idletasks()
+
     # Calculate metrics for a single exam based on active constraints
     def _calculate_exam_metrics(self, exam_data, full_solution, problem, active_constraints):
         """Calculate metrics for a single exam based on active constraints"""
@@ -568,7 +572,7 @@ class SchedulerView(timetablinggui.TimetablingGUI):
             for other_exam in full_solution:
                 if other_exam['examId'] != exam_data['examId']:
                     other = problem.exams[other_exam['examId']]
-                    if set(exam.students) & set(other.students):  # If students overlap
+                    if not exam.students.isdisjoint(other.students):  # If students overlap
                         gap = abs(other_exam['timeSlot'] - exam_data['timeSlot'])
                         min_gap = min(min_gap, gap)
             metrics['student_spacing'] = str(min_gap) if min_gap != float('inf') else "N/A"
@@ -25,6 +25,14 @@ class GUIManager:
            self.visualization_manager
        )
 
+       # Stop the solver pool when the window closes
+       self.view.protocol("WM_DELETE_WINDOW", self.close)
+
+   # Shut down background workers and close the window
+   def close(self):
+       self.scheduler_controller.shutdown()
+       self.view.destroy()
+
    # Start the main GUI event loop
    def run(self):
        self.view.mainloop()
@@ -5,3 +5,6 @@ Imports all the necessary classes and functions from the utilities package.
 from .typehints import Room, TimeSlot, Exam, SchedulingProblem, TimetableMetrics
 from .metrics import MetricsAnalyzer
 from .abstracts import ISolver, IConstraint, BaseSolver
+from .heuristics import greedy_assign
+from .functions import set_solver_threads, solver_threads
+from .caching import LRUCache
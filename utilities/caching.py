@@ -0,0 +1,38 @@
+# Import OrderedDict to keep entries in least recently used order
+from collections import OrderedDict
+# Import typing hints for cache keys and values
+from typing import Any, Hashable, Optional
+
+
+# Number of built models each solver keeps for reuse across repeated solves
+MODEL_CACHE_SIZE = 8
+
+
+# Small least-recently-used store for built solver models reused across repeated solves
+class LRUCache:
+    """Keeps up to maxsize entries, evicting the least recently used one when a new entry would exceed it"""
+
+    def __init__(self, maxsize: int = MODEL_CACHE_SIZE):
+        # Most entries kept before the least recently used one is dropped
+        self.maxsize = maxsize
+        # Entries in least recently used order, oldest first
+        self._entries = OrderedDict()
+
+    # Look up an entry, marking it as the most recently used
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The value stored under key, or None when there is none"""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    # Store an entry as the most recently used, evicting the oldest once the cache is full
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, replacing any previous value"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,3 +1,24 @@
+# Import os to size solver thread counts to the machine
+import os
+
+
+# Threads each solver may use; None lets every solver use all cores
+_solver_threads = None
+
+
+# Function that limits the threads every solver started afterwards in this process may use
+def set_solver_threads(threads: int | None) -> None:
+    """Cap solver threads in this process, or lift the cap with None"""
+    global _solver_threads
+    _solver_threads = threads
+
+
+# Function that returns the number of threads a solver should ask its backend for
+def solver_threads() -> int:
+    """Threads set by set_solver_threads, defaulting to every core"""
+    return _solver_threads or os.cpu_count() or 1
+
+
 # Function that takes milliseconds as input and returns a formatted time string
 def format_elapsed_time(elapsed_ms: int) -> str:
     """Format milliseconds into minutes, seconds, and milliseconds"""
@@ -0,0 +1,50 @@
+# Import typing hints for solution structures
+from typing import List, Optional
+# Import scheduling problem type
+from utilities.typehints import SchedulingProblem
+
+
+# Build a quick feasible timetable to seed exact solvers with an incumbent
+def greedy_assign(problem: SchedulingProblem) -> Optional[List[dict]]:
+    """First-fit assignment of exams, largest first, into the earliest free (room, slot)
+
+    Each (room, slot) holds at most one exam that fits its capacity, and no student
+    sits two exams in the same or adjacent slots. Returns None when an exam cannot be placed.
+    """
+    # Try smaller rooms first so large rooms stay free for large exams
+    room_order = sorted(range(problem.number_of_rooms), key=lambda r: problem.rooms[r].capacity)
+    # (room, slot) cells already taken
+    used_cells = set()
+    # Slots each student already has an exam in
+    student_slots = {}
+
+    assignment = {}
+    # Place the hardest-to-fit exams first
+    for e in sorted(range(problem.number_of_exams), key=lambda e: -problem.exams[e].get_student_count()):
+        exam = problem.exams[e]
+        size = exam.get_student_count()
+
+        # Slots already used by any of this exam's students
+        blocked = set()
+        for student in exam.students:
+            blocked.update(student_slots.get(student, ()))
+
+        for t in range(problem.number_of_slots):
+            # Keep a free slot either side of every other exam the students sit
+            if t in blocked or t - 1 in blocked or t + 1 in blocked:
+                continue
+            room = next((r for r in room_order
+                         if problem.rooms[r].capacity >= size and (r, t) not in used_cells), None)
+            if room is None:
+                continue
+
+            used_cells.add((room, t))
+            for student in exam.students:
+                student_slots.setdefault(student, set()).add(t)
+            assignment[e] = (room, t)
+            break
+        else:
+            return None
+
+    return [{'examId': e, 'room': assignment[e][0], 'timeSlot': assignment[e][1]}
+            for e in range(problem.number_of_exams)]
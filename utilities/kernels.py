@@ -0,0 +1,255 @@
+# Import numpy for array allocation inside compiled kernels
+import numpy as np
+# Import numba JIT compiler for tight integer loops
+from numba import njit, prange
+
+
+# Compute each student's exam spread (latest slot minus earliest slot)
+@njit(cache=True)
+def student_spreads(indptr, students, exam_slots, number_of_students, number_of_slots):
+    """Per-student exam spreads over a CSR exam-to-students layout, in the dtype of exam_slots"""
+    # Earliest and latest slot seen for each student, starting from out-of-range sentinels
+    earliest = np.full(number_of_students, number_of_slots, dtype=exam_slots.dtype)
+    latest = np.full(number_of_students, -1, dtype=exam_slots.dtype)
+
+    # Walk each scheduled exam's students; unscheduled exams carry slot -1
+    for e in range(exam_slots.shape[0]):
+        slot = exam_slots[e]
+        if slot < 0:
+            continue
+        for k in range(indptr[e], indptr[e + 1]):
+            s = students[k]
+            if slot < earliest[s]:
+                earliest[s] = slot
+            if slot > latest[s]:
+                latest[s] = slot
+
+    # Students with no exams have spread 0; a single exam gives earliest == latest and so 0 as well
+    spreads = np.zeros(number_of_students, dtype=exam_slots.dtype)
+    for s in range(number_of_students):
+        if latest[s] >= 0:
+            spreads[s] = latest[s] - earliest[s]
+
+    return spreads
+
+
+# Number of set bits in a 64-bit word
+@njit(cache=True)
+def popcount64(bits):
+    """Population count of a uint64 word"""
+    count = 0
+    while bits:
+        bits &= bits - np.uint64(1)
+        count += 1
+    return count
+
+
+# GA fitness: penalty of one [rooms..., time slots...] individual,
+# using caller-owned scratch buffers so repeated evaluations allocate nothing
+@njit(cache=True)
+def individual_penalty(individual, indptr, students, exam_size, room_capacity, room_usage, student_bits):
+    """1000 per exam overfilling its room and per same or adjacent slot pair of a student's exams"""
+    number_of_exams = exam_size.shape[0]
+    penalties = 0
+    # Students seated in each (room, time slot), and each student's occupied slots as a bitset of 64-slot words
+    room_usage.fill(0)
+    student_bits.fill(0)
+
+    for e in range(number_of_exams):
+        room = individual[e]
+        time = individual[number_of_exams + e]
+
+        # Penalize every exam that pushes its room past capacity
+        room_usage[room, time] += exam_size[e]
+        if room_usage[room, time] > room_capacity[room]:
+            penalties += 1000
+
+        # Mark this exam's slot for each of its students; a slot already marked is a same-slot clash
+        word = time >> 6
+        bit = np.uint64(1) << np.uint64(time & 63)
+        for k in range(indptr[e], indptr[e + 1]):
+            student = students[k]
+            if student_bits[student, word] & bit:
+                penalties += 1000
+            else:
+                student_bits[student, word] |= bit
+
+    # Occupied slots directly followed by another occupied slot are back-to-back exams
+    for student in range(student_bits.shape[0]):
+        carry = np.uint64(0)
+        for word in range(student_bits.shape[1]):
+            bits = student_bits[student, word]
+            penalties += 1000 * popcount64(bits & (bits >> np.uint64(1)))
+            # Slot 63 of the previous word next to slot 0 of this one
+            if carry & bits & np.uint64(1):
+                penalties += 1000
+            carry = bits >> np.uint64(63)
+
+    return penalties
+
+
+# GA fitness for a batch: penalties of a whole (population, 2 * exams) chromosome matrix across all cores,
+# each worker striding over individuals with its own slice of the scratch buffers
+@njit(parallel=True, cache=True)
+def population_penalties(population, indptr, students, exam_size, room_capacity, room_usage, student_bits):
+    """individual_penalty for every row of population, with scratch buffers stacked per worker"""
+    penalties = np.empty(population.shape[0], dtype=np.int64)
+    workers = room_usage.shape[0]
+    for w in prange(workers):
+        for p in range(w, population.shape[0], workers):
+            penalties[p] = individual_penalty(population[p], indptr, students, exam_size, room_capacity,
+                                              room_usage[w], student_bits[w])
+    return penalties
+
+
+# Local-search penalty of a timetable given as per-exam room and slot arrays, with a caller-owned room-load buffer
+@njit(cache=True, nogil=True)
+def timetable_penalty(rooms, times, exam_order, exam_size, room_capacity, indptr, exams, room_usage,
+                      capacity_weight, conflict_weight):
+    """capacity_weight per student over a room's capacity, accumulated in exam_order, plus conflict_weight per same
+    or adjacent slot pair between consecutive exams of a student, over a CSR student-to-exams layout"""
+    penalties = 0
+    room_usage.fill(0)
+
+    # Each exam pushing its room past capacity is penalized by the students it adds beyond it
+    for e in exam_order:
+        room = rooms[e]
+        time = times[e]
+        overflow = room_usage[room, time] + exam_size[e] - room_capacity[room]
+        if overflow > 0:
+            penalties += overflow * capacity_weight
+        room_usage[room, time] += exam_size[e]
+
+    # Sort each student's slots and penalize consecutive exams less than two slots apart
+    slots = np.empty(exams.shape[0], dtype=times.dtype)
+    for s in range(indptr.shape[0] - 1):
+        count = indptr[s + 1] - indptr[s]
+        if count < 2:
+            continue
+        for k in range(count):
+            slots[k] = times[exams[indptr[s] + k]]
+        slots[:count].sort()
+        for k in range(count - 1):
+            if slots[k + 1] - slots[k] < 2:
+                penalties += conflict_weight
+
+    return penalties
+
+
+# Overflow penalty of one (room, slot) cell, accumulated in exam_order, with the moved exam placed in it or not
+@njit(cache=True, nogil=True)
+def _cell_overflow(rooms, times, exam_order, exam_size, capacity, room, time, moved, moved_inside):
+    load = 0
+    penalty = 0
+    for e in exam_order:
+        if e == moved:
+            inside = moved_inside
+        else:
+            inside = rooms[e] == room and times[e] == time
+        if inside:
+            load += exam_size[e]
+            if load > capacity:
+                penalty += load - capacity
+    return penalty
+
+
+# Close consecutive slot pairs among one student's exams, with the moved exam at the given slot
+@njit(cache=True, nogil=True)
+def _student_close_pairs(times, indptr, exams, student, moved, moved_time, slots):
+    count = indptr[student + 1] - indptr[student]
+    for k in range(count):
+        e = exams[indptr[student] + k]
+        slots[k] = moved_time if e == moved else times[e]
+    slots[:count].sort()
+    pairs = 0
+    for k in range(count - 1):
+        if slots[k + 1] - slots[k] < 2:
+            pairs += 1
+    return pairs
+
+
+# Change in timetable_penalty when one exam moves to (new_room, new_time), without building the moved timetable
+@njit(cache=True, nogil=True)
+def timetable_move_delta(rooms, times, moved, new_room, new_time, exam_order, exam_size, room_capacity,
+                         exam_indptr, exam_students, student_indptr, student_exams, slots,
+                         capacity_weight, conflict_weight):
+    """timetable_penalty(after the move) - timetable_penalty(rooms, times), recomputing only the two affected
+    cells and the moved exam's students; slots is scratch at least as long as any student's exam list"""
+    old_room = rooms[moved]
+    old_time = times[moved]
+    delta = 0
+
+    # Only the cell the exam leaves and the cell it enters change their overflow
+    if new_room != old_room or new_time != old_time:
+        delta += (_cell_overflow(rooms, times, exam_order, exam_size, room_capacity[old_room],
+                                 old_room, old_time, moved, False)
+                  - _cell_overflow(rooms, times, exam_order, exam_size, room_capacity[old_room],
+                                   old_room, old_time, moved, True)) * capacity_weight
+        delta += (_cell_overflow(rooms, times, exam_order, exam_size, room_capacity[new_room],
+                                 new_room, new_time, moved, True)
+                  - _cell_overflow(rooms, times, exam_order, exam_size, room_capacity[new_room],
+                                   new_room, new_time, moved, False)) * capacity_weight
+
+    # Only the exam's own students see their slots change
+    if new_time != old_time:
+        for k in range(exam_indptr[moved], exam_indptr[moved + 1]):
+            student = exam_students[k]
+            before = _student_close_pairs(times, student_indptr, student_exams, student, moved, old_time, slots)
+            after = _student_close_pairs(times, student_indptr, student_exams, student, moved, new_time, slots)
+            delta += (after - before) * conflict_weight
+
+    return delta
+
+
+# timetable_move_delta for a batch of (exam, room, slot) moves across all cores,
+# each worker striding over moves with its own row of the slot scratch buffer
+@njit(parallel=True, cache=True)
+def timetable_move_deltas(rooms, times, moves, exam_order, exam_size, room_capacity,
+                          exam_indptr, exam_students, student_indptr, student_exams, slots,
+                          capacity_weight, conflict_weight):
+    """timetable_move_delta for every row of moves, with slot scratch buffers stacked per worker"""
+    deltas = np.empty(moves.shape[0], dtype=np.int64)
+    workers = slots.shape[0]
+    for w in prange(workers):
+        for m in range(w, moves.shape[0], workers):
+            deltas[m] = timetable_move_delta(rooms, times, moves[m, 0], moves[m, 1], moves[m, 2],
+                                             exam_order, exam_size, room_capacity, exam_indptr, exam_students,
+                                             student_indptr, student_exams, slots[w],
+                                             capacity_weight, conflict_weight)
+    return deltas
+
+
+# Greedy local-search placement: put each exam, in the given order, in the (room, slot) cell with space left whose
+# slot has the fewest of its students busy in the same or an adjacent slot, updating the caller's tracking arrays
+@njit(cache=True)
+def greedy_place(rooms, times, exams, exam_size, room_capacity, indptr, students, room_usage, student_busy):
+    """Writes each placed exam's cell into rooms and times; ties go to the first cell in (room, slot) order,
+    and an exam with no cell left goes to (0, 0)"""
+    number_of_rooms, number_of_slots = room_usage.shape
+    conflicts = np.empty(number_of_slots, dtype=np.int64)
+
+    for exam in exams:
+        size = exam_size[exam]
+
+        # Students with an exam in the same or an adjacent slot, for every slot
+        conflicts.fill(0)
+        for k in range(indptr[exam], indptr[exam + 1]):
+            s = students[k]
+            for t in range(number_of_slots):
+                if (student_busy[s, t] or (t > 0 and student_busy[s, t - 1])
+                        or (t + 1 < number_of_slots and student_busy[s, t + 1])):
+                    conflicts[t] += 1
+
+        # Best cell with space left
+        best_room, best_time, best_cost = 0, 0, -1
+        for r in range(number_of_rooms):
+            for t in range(number_of_slots):
+                if room_usage[r, t] + size <= room_capacity[r] and (best_cost < 0 or conflicts[t] < best_cost):
+                    best_room, best_time, best_cost = r, t, conflicts[t]
+
+        # Update tracking structures
+        room_usage[best_room, best_time] += size
+        for k in range(indptr[exam], indptr[exam + 1]):
+            student_busy[students[k], best_time] = True
+        rooms[exam] = best_room
+        times[exam] = best_time
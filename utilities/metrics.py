@@ -1,7 +1,11 @@
 # Import dictionary and list types from typing module
 from typing import Dict, List
+# Import numpy for vectorized aggregation over solutions
+import numpy as np
 # Import custom type hints for scheduling problem and metrics
 from utilities.typehints import SchedulingProblem, TimetableMetrics
+# Import compiled kernel for the per-student spread aggregation
+from utilities.kernels import student_spreads
 
 
 # Class to analyze and calculate various metrics for exam scheduling
@@ -13,18 +17,23 @@ class MetricsAnalyzer:
 
     # Calculate all metrics for a given solution
     def calculate_metrics(self, solution: List[dict]) -> TimetableMetrics:
+        # Materialize the solution once as parallel integer arrays for vectorized aggregation
+        exam_ids = np.fromiter((exam_data['examId'] for exam_data in solution), dtype=np.int32, count=len(solution))
+        rooms = np.fromiter((exam_data['room'] for exam_data in solution), dtype=np.int32, count=len(solution))
+        slots = np.fromiter((exam_data['timeSlot'] for exam_data in solution), dtype=np.int32, count=len(solution))
+
         # Calculate room utilization and get average
-        room_utilization = self._calculate_room_utilization(solution)
+        room_utilization = self._calculate_room_utilization(exam_ids, rooms, slots)
         # Calculate average room utilization across all rooms if rooms exist, otherwise 0
         avg_room_util = sum(room_utilization.values()) / len(room_utilization) if room_utilization else 0
 
         # Calculate time distribution and average exams per slot
-        time_dist = self._calculate_time_distribution(solution)
+        time_dist = self._calculate_time_distribution(slots)
         # Calculate average number of exams per time slot if slots exist, otherwise 0
         avg_exams_per_slot = sum(time_dist.values()) / len(time_dist) if time_dist else 0
 
         # Calculate student spread metrics
-        student_spread = self._calculate_student_spread(solution)
+        student_spread = self._calculate_student_spread(exam_ids, slots)
         # Calculate total number of students
         total_students = sum(student_spread.values())
         # Calculate average spread weighted by number of students if there are students, otherwise 0
@@ -41,95 +50,46 @@ class MetricsAnalyzer:
         )
 
     # Helper method to calculate room utilization percentages
-    def _calculate_room_utilization(self, solution: List[dict]) -> Dict[int, float]:
+    def _calculate_room_utilization(self, exam_ids: np.ndarray, rooms: np.ndarray,
+                                    slots: np.ndarray) -> Dict[int, float]:
         """Calculate utilization percentage for each room"""
-        # Create nested dictionary to track room usage per time slot
-        room_usage = {r.id: {t: 0 for t in range(self.problem.number_of_slots)}
-                      for r in self.problem.rooms}
-
-        # Populate room usage data from solution
-        for exam_data in solution:
-            # Get exam object from problem using exam ID
-            exam = self.problem.exams[exam_data['examId']]
-            # Get assigned room ID
-            room_id = exam_data['room']
-            # Get assigned time slot
-            time_slot = exam_data['timeSlot']
-            # Record number of students in room for this slot
-            room_usage[room_id][time_slot] = exam.get_student_count()
-
-        # Calculate final utilization percentages
-        utilization = {}
-        # Process each room's usage data
-        for room_id, slot_usage in room_usage.items():
-            # Get room capacity
-            room_capacity = self.problem.rooms[room_id].capacity
-            # Handle case where room capacity is 0
-            if room_capacity == 0:
-                utilization[room_id] = 0
-                continue
-
-            # Initialize utilization calculation variables
-            room_utilization = 0
-            used_slots = 0
-
-            # Calculate utilization for each time slot
-            for student_count in slot_usage.values():
-                # Only consider slots where room is used
-                if student_count > 0:
-                    # Add percentage utilization for this slot
-                    room_utilization += (student_count / room_capacity) * 100
-                    # Increment count of used slots
-                    used_slots += 1
-
-            # Calculate final utilization percentage
-            if used_slots > 0:
-                # Average utilization over all time slots
-                utilization[room_id] = room_utilization / self.problem.number_of_slots
-            else:
-                # If room never used, utilization is 0
-                utilization[room_id] = 0
+        # Number of students sitting each exam, indexed by exam ID
+        student_counts = np.array([exam.get_student_count() for exam in self.problem.exams], dtype=np.float64)
+        # Room capacities, indexed by room ID
+        capacities = np.array([room.capacity for room in self.problem.rooms], dtype=np.float64)
+
+        # Record number of students in each (room, slot); a later exam in the same cell overwrites an earlier one
+        room_usage = np.zeros((self.problem.number_of_rooms, self.problem.number_of_slots))
+        room_usage[rooms, slots] = student_counts[exam_ids]
+
+        # Average percentage utilization over all time slots, leaving zero-capacity rooms at 0
+        utilization = np.divide(room_usage.sum(axis=1) * 100, capacities * self.problem.number_of_slots,
+                                out=np.zeros_like(capacities), where=capacities > 0)
 
         # Return dictionary of room utilizations
-        return utilization
+        return dict(zip((room.id for room in self.problem.rooms), utilization.tolist()))
 
     # Helper method to calculate exam distribution across time slots
-    def _calculate_time_distribution(self, solution: List[dict]) -> Dict[int, int]:
-        # Initialize dictionary with 0 exams for each time slot
-        distribution = {i: 0 for i in range(self.problem.number_of_slots)}
+    def _calculate_time_distribution(self, slots: np.ndarray) -> Dict[int, int]:
         # Count number of exams in each time slot
-        for exam_data in solution:
-            distribution[exam_data['timeSlot']] += 1
+        distribution = np.bincount(slots, minlength=self.problem.number_of_slots)
         # Return the distribution dictionary
-        return distribution
+        return dict(enumerate(distribution.tolist()))
 
     # Helper method to calculate how spread out each student's exams are
-    def _calculate_student_spread(self, solution: List[dict]) -> Dict[int, int]:
-        # Initialize dictionary to track time slots for each student
-        student_slots = {i: [] for i in range(self.problem.total_students)}
-
-        # Collect time slots for each student's exams
-        for exam_data in solution:
-            # Get exam object from solution
-            exam = self.problem.exams[exam_data['examId']]
-            # Get assigned time slot
-            time_slot = exam_data['timeSlot']
-            # Record time slot for each student in this exam
-            for student in exam.students:
-                student_slots[student].append(time_slot)
-
-        # Calculate spread statistics
-        spreads = {}
-        # Process each student's exam slots
-        for slots in student_slots.values():
-            # If student has 0 or 1 exam, spread is 0
-            if len(slots) <= 1:
-                spread = 0
-            else:
-                # Calculate spread as difference between latest and earliest exam
-                spread = max(slots) - min(slots)
-            # Increment count for this spread value
-            spreads[spread] = spreads.get(spread, 0) + 1
+    def _calculate_student_spread(self, exam_ids: np.ndarray, slots: np.ndarray) -> Dict[int, int]:
+        # Use the narrowest integer type that holds every slot so per-student arrays stay compact
+        slot_dtype = np.int16 if self.problem.number_of_slots <= np.iinfo(np.int16).max else np.int32
+
+        # Assigned slot for each exam, -1 where the solution leaves an exam unscheduled
+        exam_slots = np.full(self.problem.number_of_exams, -1, dtype=slot_dtype)
+        exam_slots[exam_ids] = slots
+
+        # Compute per-student spreads over the problem's cached CSR enrolment arrays
+        indptr, students = self.problem.exam_students_csr
+        spreads = student_spreads(indptr, students, exam_slots,
+                                  self.problem.total_students, self.problem.number_of_slots)
 
         # Return dictionary of spread frequencies
-        return spreads
+        histogram = np.bincount(spreads, minlength=1)
+        return {spread: count for spread, count in enumerate(histogram.tolist()) if count}
@@ -1,7 +1,12 @@
 # Import dataclass decorator from dataclasses module
 from dataclasses import dataclass
+# Import cached_property to compute derived arrays once per problem
+from functools import cached_property
 # Import typing hints for complex data structures
-from typing import List, Dict, Set, Optional
+from typing import List, Dict, Set, Optional, Tuple
+
+# Import numpy for array representations of the problem
+import numpy as np
 
 
 # Domain Models section begins
@@ -95,6 +100,38 @@ class SchedulingProblem:
         # Return length of invigilators list if exists, otherwise 0
         return len(self.invigilators) if self.invigilators else 0
 
+    # Exam enrolments as CSR arrays: students of exam e are students[indptr[e]:indptr[e + 1]]
+    @cached_property
+    def exam_students_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Offsets into the flat student array for each exam
+        indptr = np.zeros(self.number_of_exams + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum([exam.get_student_count() for exam in self.exams])
+        # Flat, per-exam sorted student IDs
+        students = np.fromiter((s for exam in self.exams for s in sorted(exam.students)),
+                               dtype=np.int32, count=int(indptr[-1]))
+        return indptr, students
+
+    # Exam enrolments transposed: exams of student s are exams[indptr[s]:indptr[s + 1]], in exam ID order
+    @cached_property
+    def student_exams_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        exam_indptr, students = self.exam_students_csr
+        # Offsets into the flat exam array for each student
+        indptr = np.zeros(self.total_students + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum(np.bincount(students, minlength=self.total_students))
+        # Exam of each enrolment, regrouped by student; the stable sort keeps each student's exams in ID order
+        enrolment_exams = np.repeat(np.arange(self.number_of_exams, dtype=np.int32), np.diff(exam_indptr))
+        exams = enrolment_exams[np.argsort(students, kind='stable')]
+        return indptr, exams
+
+    # Everything about the problem that shapes a solver model apart from room capacities
+    def topology_key(self) -> tuple:
+        exams = tuple((frozenset(exam.students), getattr(exam, 'department', None),
+                       getattr(exam, 'morning_required', None)) for exam in self.exams)
+        invigilators = None if self.invigilators is None else tuple(
+            (invigilator.id, invigilator.max_exams_per_day, frozenset(invigilator.unavailable_slots))
+            for invigilator in self.invigilators)
+        return self.number_of_rooms, self.number_of_slots, self.total_students, exams, invigilators
+
     # Method to add default invigilators if none exist
     def add_default_invigilators(self, num_invigilators: int = None):
         """Add default invigilators if none exist"""